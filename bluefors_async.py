@@ -0,0 +1,127 @@
+# asyncio front end of bluefors_log_view
+# Load the days of one or several fridges from a dashboard or notebook event loop, with
+# the reads and parsing in an executor and a semaphore bounding the jobs in flight.
+
+import asyncio
+import contextlib
+import functools
+from datetime import date, timedelta
+
+from bluefors_log_view import BlueForsLogLoader
+
+
+class AsyncBlueForsLogLoader:
+    """ asyncio front end of a BlueForsLogLoader.
+
+    Reading and parsing run in an executor, one task per (type, day), so the event loop
+    is never blocked. A semaphore bounds the number of tasks running at once; sharing one
+    semaphore bounds the load of several fridges together:
+
+        semaphore = asyncio.Semaphore(8)
+        loaders = await asyncio.gather(*(AsyncBlueForsLogLoader.open(folder, start_date, end_date, semaphore=semaphore)
+                                         for folder in folders))
+
+    Cancelling an open() or another coroutine stops it from starting new tasks; the tasks
+    already running in the executor keep their slot of the semaphore until they finish,
+    and the days already parsed stay in the loader.
+    """
+
+    def __init__(self, loader:BlueForsLogLoader, executor=None, semaphore:asyncio.Semaphore=None, concurrency:int=4):
+        """
+        Parameters
+        ----------
+        loader : BlueForsLogLoader
+            Loader doing the work, usually created lazy by open().
+        executor : concurrent.futures.Executor
+            Executor of the file reads and parsing; the default executor of the event loop if None.
+        semaphore : asyncio.Semaphore
+            Bound on the tasks running at once, possibly shared between loaders.
+            A new Semaphore(concurrency) if None.
+        """
+        self.loader = loader
+        self.executor = executor
+        self.semaphore = semaphore if semaphore is not None else asyncio.Semaphore(concurrency)
+
+    @classmethod
+    async def open(cls, log_folder:str, start_date:date, end_date:date, what_type_to_load:str=None,
+                   executor=None, semaphore:asyncio.Semaphore=None, concurrency:int=4, **kwargs):
+        """
+        Create a loader and load the days of the given type, or of all types, without blocking.
+        The other keyword arguments are passed to BlueForsLogLoader; with lazy=True nothing is loaded.
+        """
+        lazy = kwargs.pop('lazy', False)
+        self = cls(None, executor, semaphore, concurrency)
+        self.loader = await self._run(BlueForsLogLoader, log_folder, start_date, end_date,
+                                      what_type_to_load=what_type_to_load, lazy=True, **kwargs)
+        if not lazy:
+            await self.load(*(self.loader.log_types if what_type_to_load is None else [what_type_to_load]))
+        return self
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in the executor once the semaphore allows it.
+
+        A job cannot be stopped once it runs in the executor, so when the coroutine is
+        cancelled, the slot of the semaphore is held until the job finishes; otherwise
+        cancelled jobs would pile up in the executor beyond the bound.
+        """
+        async with self.semaphore:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                while not future.done():
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await asyncio.wait([future])
+                if not future.cancelled():
+                    future.exception() # retrieved, the caller was cancelled anyway
+                raise
+
+    async def load(self, *types:str):
+        """ Read the days of the given log types that are not in memory yet, concurrently. """
+        loader = self.loader
+        num_days = (loader.end_date - loader.start_date).days + 1
+        tasks = [ asyncio.ensure_future(self._run(loader._load_days, type, day, day))
+                  for type in types for day in (loader.start_date + timedelta(days=i) for i in range(num_days))
+                  if day not in loader._days[type] ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def channels(self, type:str):
+        """ Async BlueForsLogLoader.channels. """
+        await self.load(type)
+        return await self._run(self.loader.channels, type)
+
+    async def series(self, type:str, name:str, start=None, end=None):
+        """ Async BlueForsLogLoader.series. """
+        await self.load(type)
+        return await self._run(self.loader.series, type, name, start, end)
+
+    async def aligned(self, freq:str='1min', how:str='mean', types:list=None, tolerance:str=None):
+        """ Async BlueForsLogLoader.aligned. """
+        if types is not None:
+            await self.load(*types)
+        return await self._run(self.loader.aligned, freq, how, types, tolerance)
+
+    async def derived(self, name:str):
+        """ Async BlueForsLogLoader.derived. """
+        definition = self.loader.derived_channels.get(name)
+        if definition is not None:
+            await self.load(*{ type for type, _ in definition['inputs'] })
+        return await self._run(self.loader.derived, name)
+
+    async def rollups(self, type:str, resolution:str='1h', start=None, end=None):
+        """ Async BlueForsLogLoader.rollups. """
+        return await self._run(self.loader.rollups, type, resolution, start, end)
+
+    async def refresh(self, today:date=None, follow:bool=None):
+        """ Async BlueForsLogLoader.refresh. """
+        return await self._run(self.loader.refresh, today, follow)
+
+    def window(self, start_date:date, end_date:date):
+        """ Return an AsyncBlueForsLogLoader of a window of the loader, sharing the executor and semaphore. """
+        return AsyncBlueForsLogLoader(self.loader.window(start_date, end_date), self.executor, self.semaphore)
@@ -0,0 +1,685 @@
+# Benchmarks for bluefors_log_view
+# Generate synthetic Bluefors log folders, time and memory-profile the loader and the
+# plotter on them, and optionally store the results as JSON to track regressions.
+
+import os
+import io
+import sys
+import json
+import shutil
+import time
+import argparse
+import contextlib
+import platform
+import warnings
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from datetime import date, datetime, timedelta
+
+from bluefors_log_view import (BlueForsLogLoader, BlueForsLogManifest, BlueForPlotter, ChannelSeries, parse_datetimes,
+                               parse_maxigauge_buffer)
+from bluefors_events import EventDetector
+from bluefors_fleet import BlueForsFleetLoader
+from bluefors_store import BlueForsLogStore
+
+STATUS_KEYS = ['ctrl_pres_ok', 'ctrl_pres', 'cpastate', 'cparun', 'cpawarn', 'cpaerr', 'cpatempwi', 'cpatempwo',
+               'cpatempo', 'cpatemph', 'cpalp', 'cpalpa', 'cpahp', 'cpahpa', 'cpadp', 'cpacurrent', 'cpahours',
+               'cpapscale', 'cpatscale', 'cpasn', 'cpamodel', 'tc400actualspd', 'tc400drvpower']
+
+PLOT_PANELS = ["temperature", "resistance", "pressure", "flowmeter", "status", "compressor_pressure", "compressor_temperature"]
+
+
+def status_keys(compressors:int=1):
+    """Status keys of a system with one or two compressors; the second one has '_2' keys."""
+    keys = list(STATUS_KEYS)
+    if compressors == 2:
+        keys += [ key + "_2" for key in STATUS_KEYS if key.startswith("cpa") ]
+    return keys
+
+
+def write_synthetic_logs(log_folder:str, start_date:date, num_days:int, interval:int=60, seed:int=0,
+                         rates:dict=None, compressors:int=1, ragged:float=0.0, leading_space:bool=True):
+    """Write `num_days` of synthetic CH* T/R, maxigauge, Flowmeter and Status_ logs.
+
+    Parameters
+    ----------
+    log_folder : str
+        Folder in which the yy-mm-dd date folders are created.
+    interval : int
+        Sampling interval in seconds.
+    rates : dict
+        Sampling interval in seconds per file kind, overriding interval, e.g.
+        {'channels': 10, 'maxigauge': 60, 'flowmeter': 60, 'status': 120}.
+    compressors : int
+        1 or 2; with 2 the Status_ lines also carry the '_2' keys of a second compressor.
+    ragged : float
+        Fraction of Status_ lines that lose some of their key/value pairs or end with a
+        key without a value, as happens when a device does not answer.
+    leading_space : bool
+        Write the CH* lines with the leading space before the date of real log files.
+    """
+    rng = np.random.default_rng(seed)
+    rates = { kind: (rates or {}).get(kind) or interval for kind in ['channels', 'maxigauge', 'flowmeter', 'status'] }
+    keys = status_keys(compressors)
+
+    for i in range(num_days):
+        day = start_date + timedelta(days=i)
+        date_str = day.strftime("%y-%m-%d")
+        base_path = os.path.join(log_folder, date_str)
+        os.makedirs(base_path, exist_ok=True)
+        midnight = datetime.combine(day, datetime.min.time())
+
+        def stamps(kind):
+            return [ (midnight + timedelta(seconds=int(s))).strftime("%d-%m-%y,%H:%M:%S")
+                     for s in np.arange(0, 24*3600, rates[kind]) ]
+
+        channel_stamps = stamps('channels')
+        prefix = " " if leading_space else ""
+        for ch, base in zip([1, 2, 5, 6], [45.0, 3.5, 0.9, 0.01]):
+            for kind, scale in [("T", 1.0), ("R", 1000.0)]:
+                values = base*scale*(1 + 0.01*rng.standard_normal(len(channel_stamps)))
+                lines = [ f"{prefix}{stamp},{value:.6E}\n" for stamp, value in zip(channel_stamps, values) ]
+                with open(os.path.join(base_path, f"CH{ch} {kind} {date_str}.log"), 'w') as f:
+                    f.writelines(lines)
+
+        maxigauge_stamps = stamps('maxigauge')
+        pressures = 10**rng.uniform(-3, 3, size=(len(maxigauge_stamps), 6))
+        off = len(maxigauge_stamps)//24 # CH6 is switched off during the first hour
+        with open(os.path.join(base_path, f"maxigauge {date_str}.log"), 'w') as f:
+            for j, (stamp, row) in enumerate(zip(maxigauge_stamps, pressures)):
+                groups = [ f"CH{k+1},       , 0,{p:.2E},4,1" if k == 5 and j < off else f"CH{k+1},       , 1,{p:.2E},0,1"
+                           for k, p in enumerate(row) ]
+                f.write(stamp + "," + ",".join(groups) + ",\n")
+
+        flowmeter_stamps = stamps('flowmeter')
+        flows = 0.5 + 0.05*rng.standard_normal(len(flowmeter_stamps))
+        with open(os.path.join(base_path, f"Flowmeter {date_str}.log"), 'w') as f:
+            f.writelines([ f"{stamp},{flow:.6E}\n" for stamp, flow in zip(flowmeter_stamps, flows) ])
+
+        status_stamps = stamps('status')
+        status = rng.uniform(0, 100, size=(len(status_stamps), len(keys)))
+        is_ragged = rng.random(len(status_stamps)) < ragged
+        with open(os.path.join(base_path, f"Status_{date_str}.log"), 'w') as f:
+            for stamp, row, cut in zip(status_stamps, status, is_ragged):
+                pairs = [ f"{key},{value:.6E}" for key, value in zip(keys, row) ]
+                if cut:
+                    pairs = pairs[:rng.integers(1, len(pairs))]
+                    if rng.random() < 0.5:
+                        pairs.append(keys[len(pairs)]) # key without a value
+                f.write(stamp + "," + ",".join(pairs) + "\n")
+
+
+def _time(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+def _profile(func, *args, **kwargs):
+    """Time one call of func, then repeat it under tracemalloc for its peak memory in bytes."""
+    elapsed, result = _time(func, *args, **kwargs)
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def _load(log_folder:str, start_date:date, end_date:date, what_type_to_load:str=None, **kwargs):
+    """Build a loader and assemble the channels of the loaded types."""
+    loader = BlueForsLogLoader(log_folder, start_date, end_date, what_type_to_load=what_type_to_load, **kwargs)
+    for type in ([what_type_to_load] if what_type_to_load else loader.log_types):
+        loader.channels(type)
+    return loader
+
+
+def bench_scaling(log_folder:str, start_date:date, day_counts:list, what_type_to_load:str="temperature"):
+    """Time a full load for each number of days; linear loading keeps ms/day flat."""
+    print(f"\nLoad time of '{what_type_to_load}' against date range")
+    print(f"{'days':>6} {'total (s)':>10} {'ms/day':>8}")
+    rows = []
+    for num_days in day_counts:
+        end_date = start_date + timedelta(days=num_days-1)
+        elapsed, _ = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load)
+        print(f"{num_days:>6} {elapsed:>10.3f} {1e3*elapsed/num_days:>8.2f}")
+        rows.append({"type": what_type_to_load, "days": num_days, "seconds": elapsed})
+    return rows
+
+
+def bench_load_paths(log_folder:str, start_date:date, num_days:int):
+    """Time and memory-profile each _load_<type>_oneday reader over num_days days."""
+    print(f"\nReaders over {num_days} days (peak memory from a second, traced run)")
+    print(f"{'type':>12} {'total (s)':>10} {'ms/day':>8} {'peak (MB)':>10} {'points':>10}")
+    dates = [ start_date + timedelta(days=i) for i in range(num_days) ]
+    loader = BlueForsLogLoader(log_folder, start_date, dates[-1], lazy=True)
+
+    rows = []
+    for type in loader.log_types:
+        load_oneday = getattr(loader, f"_load_{type}_oneday")
+        elapsed, peak, days = _profile(lambda: [ load_oneday(day) for day in dates ])
+        points = sum(len(channel) for channels in days for channel in channels.values())
+        print(f"{type:>12} {elapsed:>10.3f} {1e3*elapsed/num_days:>8.2f} {peak/2**20:>10.1f} {points:>10}")
+        rows.append({"type": type, "days": num_days, "seconds": elapsed, "peak_bytes": peak, "points": points})
+    return rows
+
+
+def bench_readers(log_folder:str, start_date:date, num_days:int):
+    """Compare the 'pandas' and 'mmap' readers of the CH* and Flowmeter logs."""
+    print(f"\nCH* and Flowmeter readers over {num_days} days (peak memory from a second, traced run)")
+    print(f"{'type':>12} {'reader':>7} {'total (s)':>10} {'peak (MB)':>10}")
+    dates = [ start_date + timedelta(days=i) for i in range(num_days) ]
+
+    rows = []
+    for type in ["temperature", "flowmeter"]:
+        for reader in ["pandas", "mmap"]:
+            loader = BlueForsLogLoader(log_folder, start_date, dates[-1], lazy=True, reader=reader)
+            load_oneday = getattr(loader, f"_load_{type}_oneday")
+            elapsed, peak, _ = _profile(lambda: [ load_oneday(day) for day in dates ])
+            print(f"{type:>12} {reader:>7} {elapsed:>10.3f} {peak/2**20:>10.1f}")
+            rows.append({"type": type, "reader": reader, "days": num_days, "seconds": elapsed, "peak_bytes": peak})
+    return rows
+
+
+def bench_maxigauge(log_folder:str, start_date:date, num_days:int):
+    """Compare parse_maxigauge_buffer with reading the maxigauge logs with read_csv and picking the pressure columns."""
+    print(f"\nMaxigauge parsers over {num_days} days (peak memory from a second, traced run)")
+    print(f"{'parser':>22} {'total (s)':>10} {'peak (MB)':>10}")
+    buffers = []
+    for i in range(num_days):
+        date_str = (start_date + timedelta(days=i)).strftime("%y-%m-%d")
+        file_name = os.path.join(log_folder, date_str, f"maxigauge {date_str}.log")
+        if os.path.exists(file_name):
+            with open(file_name, 'rb') as f:
+                buffers.append(f.read())
+
+    def read_csv_columns(buffer):
+        df = pd.read_csv(io.BytesIO(buffer), header=None)
+        times = parse_datetimes(df.iloc[:,0], df.iloc[:,1])
+        return times, [ df.iloc[:, column].to_numpy(dtype=float) for column in [5,11,17,23,29,35] ]
+
+    rows = []
+    for label, parse in [("read_csv, by position", read_csv_columns), ("parse_maxigauge_buffer", parse_maxigauge_buffer)]:
+        elapsed, peak, _ = _profile(lambda: [ parse(buffer) for buffer in buffers ])
+        print(f"{label:>22} {elapsed:>10.3f} {peak/2**20:>10.1f}")
+        rows.append({"parser": label, "days": len(buffers), "bytes": sum(map(len, buffers)), "seconds": elapsed, "peak_bytes": peak})
+    return rows
+
+
+def bench_manifest(log_folder:str, start_date:date, num_days:int):
+    """Time a load of a range with as many missing days as existing ones, with and without a manifest."""
+    print(f"\nLoad of {num_days} existing and {num_days} missing days, probing files or from a manifest")
+    print(f"{'files from':>10} {'total (s)':>10}")
+    end_date = start_date + timedelta(days=2*num_days-1)
+
+    rows = []
+    for manifest in (None, True):
+        with contextlib.redirect_stdout(io.StringIO()): # one FileNotFound line per missing file
+            elapsed, _ = _time(_load, log_folder, start_date, end_date, manifest=manifest)
+        name = "manifest" if manifest else "probing"
+        print(f"{name:>10} {elapsed:>10.3f}")
+        rows.append({"files_from": name, "days": 2*num_days, "seconds": elapsed})
+    return rows
+
+
+def bench_rollups(log_folder:str, start_date:date, num_days:int, what_type_to_load:str="temperature"):
+    """Time an overview of the range from the raw samples and from the cached hourly rollups."""
+    print(f"\nOverview of '{what_type_to_load}' over {num_days} days")
+    print(f"{'from':>16} {'total (s)':>10} {'rows':>10}")
+    end_date = start_date + timedelta(days=num_days-1)
+
+    def overview(**kwargs):
+        loader = BlueForsLogLoader(log_folder, start_date, end_date, lazy=True, **kwargs)
+        if "cache_dir" in kwargs:
+            return loader.rollups(what_type_to_load, "1h")
+        return loader.channels(what_type_to_load)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, kwargs in [("raw", {}), ("rollups (cold)", {"cache_dir": cache_dir}), ("rollups (warm)", {"cache_dir": cache_dir})]:
+            elapsed, channels = _time(overview, **kwargs)
+            num_rows = sum(len(channel) for channel in channels.values())
+            print(f"{name:>16} {elapsed:>10.3f} {num_rows:>10}")
+            rows.append({"type": what_type_to_load, "from": name, "days": num_days, "seconds": elapsed, "rows": num_rows})
+    return rows
+
+
+def bench_fleet(log_folder:str, start_date:date, num_days:int, num_fridges:int=4, workers:int=8, what_type_to_load:str="temperature"):
+    """Time loading several fridges one after the other and as one BlueForsFleetLoader."""
+    print(f"\nLoad of '{what_type_to_load}' ({num_days} days) for {num_fridges} fridges")
+    print(f"{'how':>16} {'total (s)':>10}")
+    end_date = start_date + timedelta(days=num_days-1)
+    log_folders = { f"BF{i+1}": log_folder for i in range(num_fridges) } # the same synthetic folder for every fridge
+
+    t_serial, _ = _time(lambda: [ _load(folder, start_date, end_date, what_type_to_load) for folder in log_folders.values() ])
+    t_threads, _ = _time(BlueForsFleetLoader, log_folders, start_date, end_date, what_type_to_load, workers=workers)
+    t_processes, _ = _time(BlueForsFleetLoader, log_folders, start_date, end_date, what_type_to_load, workers=workers, processes=True)
+
+    rows = []
+    for name, elapsed in [("one by one", t_serial), ("fleet, threads", t_threads), ("fleet, processes", t_processes)]:
+        print(f"{name:>16} {elapsed:>10.3f}")
+        rows.append({"type": what_type_to_load, "how": name, "fridges": num_fridges, "days": num_days, "seconds": elapsed})
+    return rows
+
+
+def bench_events(log_folder:str, start_date:date, num_days:int, num_updates:int=10):
+    """Time a full event scan of the range, then EventDetector.update after each refresh while the next day is written."""
+    print(f"\nEvent detection over {num_days} days, then after each of {num_updates} refreshes")
+    print(f"{'scan':>12} {'total (s)':>10} {'events':>8}")
+    live_day = start_date + timedelta(days=num_days)
+    if not os.path.isdir(os.path.join(log_folder, live_day.strftime("%y-%m-%d"))):
+        return []
+
+    with _live_folder(log_folder, start_date, num_days, num_updates) as (live_folder, append):
+        loader = BlueForsLogLoader(live_folder, start_date, live_day)
+
+        def detector():
+            detector = EventDetector()
+            for name in loader.channels('temperature'):
+                detector.add_threshold('temperature', name, above=1.05*np.nanmedian(loader.channels('temperature')[name].values),
+                                       min_duration='30min')
+            for name in loader.channels('pressure'):
+                if not BlueForsLogLoader.is_gauge_flag(name):
+                    detector.add_spikes('pressure', name, window='6h', nsigma=4)
+            detector.add_threshold('status', ('cpahp', 'cpalp'), below=-50)
+            return detector
+
+        elapsed, events = _time(detector().detect, loader)
+        print(f"{'full':>12} {elapsed:>10.3f} {len(events):>8}")
+        rows = [{"scan": "full", "days": num_days, "seconds": elapsed, "events": len(events)}]
+
+        incremental = detector()
+        incremental.detect(loader)
+        timings = []
+        for i in range(num_updates):
+            append(i)
+            loader.refresh(today=live_day)
+            elapsed, events = _time(incremental.update, loader)
+            timings.append(elapsed)
+
+    print(f"{'update':>12} {np.median(timings):>10.3f} {len(events):>8}")
+    rows.append({"scan": "update", "days": num_days, "seconds": float(np.median(timings)), "max_seconds": max(timings),
+                 "events": len(events)})
+    return rows
+
+
+def bench_plot_panels(log_folder:str, start_date:date, num_days:int, decimate:bool=True):
+    """Time and memory-profile BlueForPlotter.plot for each panel, including the Agg draw."""
+    print(f"\nPlot panels over {num_days} days (decimate={decimate}, data already loaded)")
+    print(f"{'panel':>22} {'total (s)':>10} {'peak (MB)':>10}")
+    loader = _load(log_folder, start_date, start_date + timedelta(days=num_days-1))
+    plotter = BlueForPlotter(loader, decimate=decimate)
+
+    def render(panel):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore") # fig.show() only warns with Agg
+            plotter.plot([panel], yscale="log")
+        fig = plt.gcf()
+        fig.canvas.draw()
+        plt.close(fig)
+
+    rows = []
+    for panel in PLOT_PANELS:
+        elapsed, peak, _ = _profile(render, panel)
+        print(f"{panel:>22} {elapsed:>10.3f} {peak/2**20:>10.1f}")
+        rows.append({"panel": panel, "days": num_days, "decimate": decimate, "seconds": elapsed, "peak_bytes": peak})
+    return rows
+
+
+def bench_assembly(day_counts:list, rows_per_day:int=1440):
+    """Compare growing a frame with pd.concat per day against one concatenation of all days per channel."""
+    print(f"\nAssembly of per-day chunks ({rows_per_day} rows/day)")
+    print(f"{'days':>6} {'per-day concat (s)':>19} {'single concat (s)':>18}")
+    chunk = pd.DataFrame(np.random.default_rng(0).standard_normal((rows_per_day, 4)), columns=BlueForsLogLoader._channel_names)
+    times = np.datetime64('2024-09-01T00:00:00') + np.arange(rows_per_day).astype('timedelta64[m]')
+    day = { name: ChannelSeries(times, chunk[name].to_numpy()) for name in chunk.columns }
+
+    rows = []
+    for num_days in day_counts:
+        chunks = [chunk]*num_days
+
+        def accumulate():
+            df_all = pd.DataFrame()
+            for df in chunks:
+                df_all = pd.concat([df_all, df], axis=0)
+            return df_all
+
+        t_old, _ = _time(accumulate)
+        t_new, _ = _time(ChannelSeries.concat_channels, [day]*num_days)
+        print(f"{num_days:>6} {t_old:>19.3f} {t_new:>18.3f}")
+        rows.append({"days": num_days, "per_day_concat_seconds": t_old, "single_concat_seconds": t_new})
+    return rows
+
+
+def bench_workers(log_folder:str, start_date:date, num_days:int, worker_counts:list, what_type_to_load:str="temperature"):
+    """Time a load against the number of worker threads and check it matches the serial load."""
+    print(f"\nLoad time of '{what_type_to_load}' ({num_days} days) against worker count")
+    print(f"{'workers':>7} {'total (s)':>10} {'speedup':>8}")
+    end_date = start_date + timedelta(days=num_days-1)
+    t_serial, serial = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load)
+    print(f"{1:>7} {t_serial:>10.3f} {1.0:>8.2f}")
+    rows = [{"type": what_type_to_load, "days": num_days, "workers": 1, "seconds": t_serial}]
+
+    for workers in worker_counts:
+        if workers == 1:
+            continue
+        elapsed, loader = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load, workers=workers)
+        for name, channel in serial.channels(what_type_to_load).items():
+            other = loader.channels(what_type_to_load)[name]
+            assert np.array_equal(channel.times, other.times) and np.array_equal(channel.values, other.values, equal_nan=True), \
+                f"{name} differs with {workers} workers"
+        print(f"{workers:>7} {elapsed:>10.3f} {t_serial/elapsed:>8.2f}")
+        rows.append({"type": what_type_to_load, "days": num_days, "workers": workers, "seconds": elapsed})
+    return rows
+
+
+def bench_cache(log_folder:str, start_date:date, num_days:int, what_type_to_load:str=None):
+    """Time a load without cache, filling the cache, and reopening from the cache."""
+    print(f"\nLoad time of '{what_type_to_load or 'all types'}' ({num_days} days) with the parsed-day cache")
+    end_date = start_date + timedelta(days=num_days-1)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        t_plain, _ = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load)
+        t_cold, _ = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load, cache_dir=cache_dir)
+        t_warm, _ = _time(_load, log_folder, start_date, end_date, what_type_to_load=what_type_to_load, cache_dir=cache_dir)
+    print(f"{'no cache (s)':>12} {'cold (s)':>9} {'warm (s)':>9}")
+    print(f"{t_plain:>12.3f} {t_cold:>9.3f} {t_warm:>9.3f}")
+    return [{"type": what_type_to_load, "days": num_days, "no_cache_seconds": t_plain,
+             "cold_seconds": t_cold, "warm_seconds": t_warm}]
+
+
+def bench_datetime(rows:int=86400, repeat:int=5):
+    """Compare parse_datetimes with string concatenation and pd.to_datetime on a full-day 1 Hz file."""
+    print(f"\nDatetime parsing of {rows} rows (best of {repeat})")
+    print(f"{'dates':>13} {'to_datetime (ms)':>17} {'parse_datetimes (ms)':>21}")
+    start = datetime(2024, 9, 1)
+    stamps = [ (start + timedelta(seconds=i)).strftime("%d-%m-%y,%H:%M:%S") for i in range(rows) ]
+
+    results = []
+    for prefix, name in [(" ", "leading space"), ("", "no space")]:
+        text = "".join(f"{prefix}{stamp},1.0E+0\n" for stamp in stamps)
+        df = pd.read_csv(io.StringIO(text), names=['date', 'time', 'value'], header=None)
+
+        def old_path():
+            # what the loaders did before: the format with the leading space is tried first
+            try:
+                return pd.to_datetime(df['date'] + df['time'], format=' %d-%m-%y%H:%M:%S')
+            except ValueError:
+                return pd.to_datetime(df['date'] + df['time'], format='%d-%m-%y%H:%M:%S')
+
+        t_old = min(_time(old_path)[0] for _ in range(repeat))
+        t_new = min(_time(parse_datetimes, df['date'], df['time'])[0] for _ in range(repeat))
+        assert (old_path().to_numpy() == parse_datetimes(df['date'], df['time'])).all()
+        print(f"{name:>13} {1e3*t_old:>17.1f} {1e3*t_new:>21.1f}")
+        results.append({"dates": name, "rows": rows, "to_datetime_seconds": t_old, "parse_datetimes_seconds": t_new})
+    return results
+
+
+def bench_plot_decimation(point_counts:list):
+    """Time drawing one '.-' line with the Agg backend, with and without M4 decimation."""
+    print("\nRender time of one line against point count")
+    print(f"{'points':>9} {'raw (s)':>8} {'decimated (s)':>14} {'drawn points':>13}")
+    rng = np.random.default_rng(0)
+
+    rows = []
+    for num_points in point_counts:
+        x = np.datetime64('2024-09-01T00:00:00') + np.arange(num_points).astype('timedelta64[m]')
+        y = np.cumsum(rng.standard_normal(num_points))
+
+        timings = []
+        for decimate in (False, True):
+            def render():
+                fig, ax = plt.subplots(figsize=(12, 3))
+                line, = BlueForPlotter(None, decimate=decimate)._plot_line(ax, x, y, '.-')
+                fig.canvas.draw()
+                plt.close(fig)
+                return len(line.get_xdata())
+
+            elapsed, drawn = _time(render)
+            timings.append(elapsed)
+        print(f"{num_points:>9} {timings[0]:>8.3f} {timings[1]:>14.3f} {drawn:>13}")
+        rows.append({"points": num_points, "raw_seconds": timings[0], "decimated_seconds": timings[1], "drawn_points": drawn})
+    return rows
+
+
+@contextlib.contextmanager
+def _live_folder(log_folder:str, start_date:date, num_days:int, num_updates:int):
+    """
+    Yield a folder with num_days days of history from log_folder and the next day half written,
+    and a function appending the i-th of num_updates chunks of the rest of that day.
+    """
+    live_day = start_date + timedelta(days=num_days)
+    source = os.path.join(log_folder, live_day.strftime("%y-%m-%d"))
+    with tempfile.TemporaryDirectory() as live_folder:
+        for i in range(num_days): # the history is shared with log_folder
+            name = (start_date + timedelta(days=i)).strftime("%y-%m-%d")
+            try:
+                os.symlink(os.path.abspath(os.path.join(log_folder, name)), os.path.join(live_folder, name))
+            except OSError:
+                shutil.copytree(os.path.join(log_folder, name), os.path.join(live_folder, name))
+
+        target = os.path.join(live_folder, live_day.strftime("%y-%m-%d"))
+        os.makedirs(target)
+        chunks = {}
+        for file_name in os.listdir(source):
+            with open(os.path.join(source, file_name), 'rb') as f:
+                lines = f.readlines()
+            with open(os.path.join(target, file_name), 'wb') as f:
+                f.writelines(lines[:len(lines)//2])
+            chunks[file_name] = np.array_split(np.array(lines[len(lines)//2:], dtype=object), num_updates)
+
+        def append(i):
+            for file_name, parts in chunks.items():
+                with open(os.path.join(target, file_name), 'ab') as f:
+                    f.writelines(parts[i])
+
+        yield live_folder, append
+
+
+def bench_live_plot(log_folder:str, start_date:date, day_counts:list, num_updates:int=20):
+    """Time BlueForPlotter.update_live on the Agg canvas while a day is written, against the days of history shown."""
+    print("\nLive plot updates against the days of history shown (Agg)")
+    print(f"{'days':>6} {'points':>9} {'plot (s)':>9} {'update (ms)':>12} {'max (ms)':>9} {'blit':>5}")
+    rows = []
+    for num_days in day_counts:
+        live_day = start_date + timedelta(days=num_days)
+        if not os.path.isdir(os.path.join(log_folder, live_day.strftime("%y-%m-%d"))):
+            continue
+
+        with _live_folder(log_folder, start_date, num_days, num_updates) as (live_folder, append):
+            loader = BlueForsLogLoader(live_folder, start_date, live_day)
+            plotter = BlueForPlotter(loader)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore") # fig.show() only warns with Agg
+                elapsed, _ = _time(plotter.plot_live, PLOT_PANELS, yscale="log")
+            points = len(loader.channels('temperature')[next(iter(loader.channels('temperature')))])
+
+            timings = []
+            for i in range(num_updates):
+                append(i)
+                timings.append(_time(plotter.update_live, today=live_day)[0])
+            blit = plotter._live['blit']
+            plotter.close_live()
+
+        print(f"{num_days:>6} {points:>9} {elapsed:>9.3f} {1e3*np.median(timings):>12.1f} {1e3*max(timings):>9.1f} {str(blit):>5}")
+        rows.append({"days": num_days, "points": points, "plot_seconds": elapsed, "update_seconds": float(np.median(timings)),
+                     "max_update_seconds": max(timings), "blit": blit})
+    return rows
+
+
+def bench_derived(log_folder:str, start_date:date, num_days:int, num_updates:int=20):
+    """Time derived channels after each refresh while a day is written: extended incrementally against computed again."""
+    print(f"\nDerived channels over {num_days} days, after each of {num_updates} refreshes")
+    print(f"{'channel':>12} {'first (s)':>10} {'memo (us)':>10} {'full (ms)':>10} {'incremental (ms)':>17}")
+    live_day = start_date + timedelta(days=num_days)
+    if not os.path.isdir(os.path.join(log_folder, live_day.strftime("%y-%m-%d"))):
+        return []
+
+    rows = []
+    with _live_folder(log_folder, start_date, num_days, num_updates) as (live_folder, append):
+        loader = BlueForsLogLoader(live_folder, start_date, live_day)
+        loader.define("P2/P1", "pressure.P2/pressure.P1")
+        loader.define("MCX-still", "temperature.MCX - temperature.still", freq="1min")
+        loader.define("water", "status.cpatempwo - status.cpatempwi", freq="1min", how="asof", tolerance="10min")
+        names = ["delta_p", "helium_flow", "MCX_rate", "P2/P1", "MCX-still", "water"]
+
+        first = { name: _time(loader.derived, name)[0] for name in names }
+        memo = { name: min(_time(loader.derived, name)[0] for _ in range(10)) for name in names }
+        full, incremental = { name: [] for name in names }, { name: [] for name in names }
+        for i in range(num_updates):
+            append(i)
+            loader.refresh(today=live_day)
+            for name in names:
+                incremental[name].append(_time(loader.derived, name)[0])
+                channel = loader.derived(name)
+                state = loader._derived.pop(name) # computed again from the memoized channels
+                elapsed, again = _time(loader.derived, name)
+                assert np.array_equal(channel.values, again.values, equal_nan=True), f"{name} differs when extended"
+                full[name].append(elapsed)
+                loader._derived[name] = state
+
+    for name in names:
+        print(f"{name:>12} {first[name]:>10.3f} {1e6*memo[name]:>10.1f} {1e3*np.median(full[name]):>10.2f} "
+              f"{1e3*np.median(incremental[name]):>17.2f}")
+        rows.append({"channel": name, "days": num_days, "first_seconds": first[name], "memo_seconds": memo[name],
+                     "full_seconds": float(np.median(full[name])), "incremental_seconds": float(np.median(incremental[name]))})
+    return rows
+
+
+def bench_store(log_folder:str, start_date:date, num_days:int):
+    """Time and memory-profile exporting to a BlueForsLogStore, then queries against parsing the text logs."""
+    print(f"\nPartitioned store of {num_days} days")
+    end_date = start_date + timedelta(days=num_days-1)
+    month_end = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as store_folder:
+        store = BlueForsLogStore(store_folder)
+        elapsed, peak, written = _profile(store.export, log_folder, start_date, end_date, overwrite=True)
+        store_bytes = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(store_folder) for file in files)
+        manifest = BlueForsLogManifest(log_folder)
+        log_bytes = sum(size for day in manifest.dates() if start_date <= day <= end_date for size, _ in manifest.files(day).values())
+        print(f"export {elapsed:.3f} s, peak {peak/2**20:.1f} MB, {len(written)} partitions, "
+              f"{store_bytes/2**20:.1f} MB (logs {log_bytes/2**20:.1f} MB)")
+        rows.append({"query": "export", "days": num_days, "seconds": elapsed, "peak_bytes": peak,
+                     "store_bytes": store_bytes, "log_bytes": log_bytes})
+
+        print(f"{'query':>22} {'store (s)':>10} {'text (s)':>9} {'speedup':>8}")
+        queries = [("MCX, first month", "temperature", ["MCX"], start_date, month_end),
+                   ("MCX, all days", "temperature", ["MCX"], start_date, end_date),
+                   ("temperatures, all days", "temperature", None, start_date, end_date)]
+        for label, type, names, first, last in queries:
+            stored, _ = _time(store.query, type, names, first, last + timedelta(days=1))
+            text, _ = _time(_load, log_folder, first, last, what_type_to_load=type)
+            print(f"{label:>22} {stored:>10.4f} {text:>9.3f} {text/stored:>8.0f}")
+            rows.append({"query": label, "days": (last - first).days + 1, "store_seconds": stored, "text_seconds": text})
+    return rows
+
+
+def bench_cli(log_folder:str, start_date:date, num_days:int):
+    """Time bluefors_cli.py commands end to end, interpreter start-up included, as a cron job runs them."""
+    print(f"\nCommand-line tool over {num_days} days (wall time of the whole process)")
+    print(f"{'command':>28} {'total (s)':>10}")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bluefors_cli.py")
+    end_date = start_date + timedelta(days=num_days-1)
+    common = ["--folder", log_folder, "--from", str(start_date), "--to", str(end_date)]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as output_folder:
+        commands = {"summary temperature": ["summary", *common, "--types", "temperature"],
+                    "summary all": ["summary", *common],
+                    "plot temperature,pressure": ["plot", *common, "--panels", "temperature,pressure", "--yscale", "log",
+                                                  "--output", os.path.join(output_folder, "report.png")]}
+        for label, arguments in commands.items():
+            elapsed, _ = _time(subprocess.run, [sys.executable, script, *arguments], capture_output=True, check=True)
+            print(f"{label:>28} {elapsed:>10.3f}")
+            rows.append({"command": label, "days": num_days, "seconds": elapsed})
+    return rows
+
+
+def bench_aligned(log_folder:str, start_date:date, num_days:int, freq:str="1min"):
+    """Time aligning all channels onto one grid with each method."""
+    print(f"\nAlignment of all channels ({num_days} days) onto a {freq} grid")
+    print(f"{'how':>5} {'total (s)':>10} {'shape':>14}")
+    loader = _load(log_folder, start_date, start_date + timedelta(days=num_days-1))
+    rows = []
+    for how in ["mean", "last", "asof"]:
+        elapsed, frame = _time(loader.aligned, freq, how)
+        print(f"{how:>5} {elapsed:>10.3f} {str(frame.shape):>14}")
+        rows.append({"how": how, "freq": freq, "days": num_days, "seconds": elapsed, "shape": list(frame.shape)})
+    return rows
+
+
+def environment():
+    """Versions and machine the benchmarks ran on, stored with the JSON results."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "matplotlib": matplotlib.__version__, "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark BlueForsLogLoader on synthetic log folders.")
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 1000])
+    parser.add_argument("--interval", type=int, default=600, help="sampling interval in seconds")
+    parser.add_argument("--channel-interval", type=int, default=None, help="sampling interval of the CH* files")
+    parser.add_argument("--status-interval", type=int, default=None, help="sampling interval of the Status_ files")
+    parser.add_argument("--compressors", type=int, choices=[1, 2], default=1)
+    parser.add_argument("--ragged", type=float, default=0.01, help="fraction of ragged Status_ lines")
+    parser.add_argument("--no-leading-space", action="store_true", help="write CH* dates without the leading space")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--points", type=int, nargs="+", default=[10**4, 10**5, 10**6, 3*10**6])
+    parser.add_argument("--folder", default=None, help="write the synthetic logs here instead of a temporary folder")
+    parser.add_argument("--json", default=None, help="store the results in this JSON file")
+    args = parser.parse_args()
+
+    rates = {"channels": args.channel_interval, "status": args.status_interval}
+    start_date = date(2024, 9, 1)
+    profile_days = min(max(args.days), 365)
+    results = {"environment": environment(), "arguments": vars(args), "benchmarks": {}}
+    benchmarks = results["benchmarks"]
+
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        log_folder = args.folder or tmp_folder
+        print(f"Writing {max(args.days)} days of synthetic logs to {log_folder} ...")
+        write_synthetic_logs(log_folder, start_date, max(args.days), interval=args.interval, rates=rates,
+                             compressors=args.compressors, ragged=args.ragged, leading_space=not args.no_leading_space)
+
+        benchmarks["datetime"] = bench_datetime()
+        benchmarks["plot_decimation"] = bench_plot_decimation(args.points)
+        benchmarks["assembly"] = bench_assembly(args.days)
+        benchmarks["load_paths"] = bench_load_paths(log_folder, start_date, profile_days)
+        benchmarks["readers"] = bench_readers(log_folder, start_date, profile_days)
+        benchmarks["maxigauge"] = bench_maxigauge(log_folder, start_date, profile_days)
+        benchmarks["manifest"] = bench_manifest(log_folder, start_date, profile_days)
+        benchmarks["plot_panels"] = bench_plot_panels(log_folder, start_date, profile_days)
+        benchmarks["scaling"], benchmarks["workers"] = [], []
+        for what in ["temperature", "pressure", "flowmeter"]:
+            benchmarks["scaling"] += bench_scaling(log_folder, start_date, args.days, what_type_to_load=what)
+            benchmarks["workers"] += bench_workers(log_folder, start_date, min(args.days), args.workers, what_type_to_load=what)
+        benchmarks["fleet"] = bench_fleet(log_folder, start_date, min(args.days), workers=max(args.workers))
+        benchmarks["cache"] = bench_cache(log_folder, start_date, profile_days, what_type_to_load="temperature")
+        benchmarks["rollups"] = bench_rollups(log_folder, start_date, profile_days)
+        benchmarks["events"] = bench_events(log_folder, start_date, profile_days)
+        benchmarks["aligned"] = bench_aligned(log_folder, start_date, profile_days)
+        benchmarks["store"] = bench_store(log_folder, start_date, profile_days)
+        benchmarks["cli"] = bench_cli(log_folder, start_date, min(args.days))
+        benchmarks["derived"] = bench_derived(log_folder, start_date, min(profile_days, max(args.days) - 1))
+        benchmarks["live_plot"] = bench_live_plot(log_folder, start_date, [ days for days in sorted({1, 30, profile_days}) if days < max(args.days) ])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
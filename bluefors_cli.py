@@ -0,0 +1,193 @@
+# Command-line tool for bluefors_log_view
+# Print channel summaries, save plots and export log folders without a notebook or a display,
+# e.g. from a cron job producing daily fridge reports:
+#
+#   python bluefors_cli.py summary --folder Z:\logs\BF5\Logfiles --days 1 --types temperature,pressure
+#   python bluefors_cli.py plot --folder Z:\logs\BF5\Logfiles --days 7 --panels temperature,pressure --output BF5.png
+#   python bluefors_cli.py export --folder Z:\logs\BF5\Logfiles --store D:\bluefors_store\BF5
+#
+# matplotlib is only imported by the plot command, so summaries start as fast as pandas.
+
+import os
+import sys
+import json
+import argparse
+import contextlib
+import numpy as np
+from datetime import date, timedelta
+
+from bluefors_log_view import BlueForsLogLoader
+
+PLOT_PANELS = ["temperature", "resistance", "pressure", "flowmeter", "status", "compressor_pressure", "compressor_temperature"]
+
+
+def summarize(loader:BlueForsLogLoader, types:list):
+    """Return the number of samples, first and last time and min/mean/max of every channel.
+
+    The statistics are computed from the parsed arrays, ignoring NaN samples. The maxigauge
+    state and status flags are left out.
+
+    Returns
+    -------
+    list
+        One dict per channel with the keys type, channel, samples, first, last, min, mean and max.
+    """
+    rows = []
+    for type in types:
+        for name, channel in loader.channels(type).items():
+            if type == 'pressure' and BlueForsLogLoader.is_gauge_flag(name):
+                continue
+
+            values = np.asarray(channel.values, dtype=float)
+            valid = values[~np.isnan(values)]
+            rows.append({"type": type, "channel": name, "samples": len(valid),
+                         "first": str(channel.times[0]) if len(channel) else None,
+                         "last": str(channel.times[-1]) if len(channel) else None,
+                         "min": float(valid.min()) if len(valid) else None,
+                         "mean": float(valid.mean()) if len(valid) else None,
+                         "max": float(valid.max()) if len(valid) else None})
+    return rows
+
+
+def _format_row(row:dict):
+    def number(value):
+        return f"{value:>11.4g}" if value is not None else f"{'-':>11}"
+    return (f"{row['type']:<12} {row['channel']:<16} {row['samples']:>8} {row['first'] or '-':>19} {row['last'] or '-':>19} "
+            f"{number(row['min'])} {number(row['mean'])} {number(row['max'])}")
+
+
+def _date_range(args):
+    end_date = args.to or date.today()
+    if args.days is not None:
+        return end_date - timedelta(days=args.days - 1), end_date
+    return args.start or end_date, end_date
+
+
+def _loader(args, start_date:date, end_date:date):
+    with contextlib.redirect_stdout(sys.stderr): # the loader reports missing files on stdout
+        return BlueForsLogLoader(args.folder, start_date, end_date, lazy=True, workers=args.workers, cache_dir=args.cache_dir,
+                                 reader=args.reader, manifest=args.manifest)
+
+
+def command_summary(args):
+    start_date, end_date = _date_range(args)
+    loader = _loader(args, start_date, end_date)
+    with contextlib.redirect_stdout(sys.stderr):
+        rows = summarize(loader, args.types)
+
+    if args.json:
+        json.dump({"folder": args.folder, "from": str(start_date), "to": str(end_date), "channels": rows}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{args.folder}: {start_date} to {end_date}")
+        print(f"{'type':<12} {'channel':<16} {'samples':>8} {'first':>19} {'last':>19} {'min':>11} {'mean':>11} {'max':>11}")
+        for row in rows:
+            print(_format_row(row))
+    return 0 if any(row["samples"] for row in rows) else 1
+
+
+def command_plot(args):
+    import matplotlib
+    matplotlib.use("Agg") # headless: render straight to the file
+    from bluefors_log_view import BlueForPlotter
+
+    start_date, end_date = _date_range(args)
+    loader = _loader(args, start_date, end_date)
+    plotter = BlueForPlotter(loader, decimate=not args.no_decimate)
+    with contextlib.redirect_stdout(sys.stderr):
+        plotter.save(args.panels, args.output, yscale=args.yscale, status_list=args.status, dpi=args.dpi)
+    print(args.output)
+    return 0
+
+
+def command_export(args):
+    from bluefors_store import BlueForsLogStore
+
+    start_date, end_date = (None, None) if args.start is None and args.to is None and args.days is None else _date_range(args)
+    store = BlueForsLogStore(args.store)
+    written = []
+    with contextlib.redirect_stdout(sys.stderr):
+        for type in args.types:
+            written += store.export(args.folder, start_date, end_date, what_type_to_load=type, workers=args.workers,
+                                    cache_dir=args.cache_dir, reader=args.reader, manifest=args.manifest)
+    for path in written:
+        print(path)
+    return 0
+
+
+def _types(value:str):
+    types = [ type.strip() for type in value.split(",") if type.strip() ]
+    unknown = [ type for type in types if type not in BlueForsLogLoader.log_types ]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown log types {unknown}, choose from {BlueForsLogLoader.log_types}")
+    return types
+
+
+def _panels(value:str):
+    panels = [ panel.strip() for panel in value.split(",") if panel.strip() ]
+    unknown = [ panel for panel in panels if panel not in PLOT_PANELS ]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown panels {unknown}, choose from {PLOT_PANELS}")
+    return panels
+
+
+def _days(value:str):
+    try:
+        days = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number of days")
+    if days < 1:
+        raise argparse.ArgumentTypeError(f"need at least 1 day, got {days}")
+    return days
+
+
+def parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--folder", required=True, help="log folder holding the yy-mm-dd date folders")
+    first = common.add_mutually_exclusive_group()
+    first.add_argument("--from", dest="start", type=date.fromisoformat, default=None, help="first day, YYYY-MM-DD")
+    first.add_argument("--days", type=_days, default=None, help="number of days ending at --to, instead of --from")
+    common.add_argument("--to", type=date.fromisoformat, default=None, help="last day, YYYY-MM-DD (default: today)")
+    common.add_argument("--types", type=_types, default=list(BlueForsLogLoader.log_types),
+                        help="comma separated log types (default: all)")
+    common.add_argument("--reader", choices=["pandas", "mmap"], default="mmap")
+    common.add_argument("--workers", type=int, default=1)
+    common.add_argument("--cache-dir", default=None, help="folder of a cache of parsed days")
+    common.add_argument("--manifest", default=None, help="JSON file of a manifest of the log folder")
+
+    parser = argparse.ArgumentParser(prog="bluefors_cli", description="Summarize, plot and export Bluefors log folders.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary = commands.add_parser("summary", parents=[common], help="print min/mean/max of every channel",
+                                  description="Print min/mean/max of every channel; the exit status is 1 if there is no data.")
+    summary.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    summary.set_defaults(func=command_summary)
+
+    plot = commands.add_parser("plot", parents=[common], help="save a plot as PNG, SVG, PDF, ...")
+    plot.add_argument("--panels", type=_panels, default=["temperature"], help="comma separated panels (default: temperature)")
+    plot.add_argument("--output", required=True, help="image file; the format follows the extension")
+    plot.add_argument("--yscale", choices=["linear", "log"], default="linear")
+    plot.add_argument("--status", type=lambda value: value.split(","), default=None, help="status keys of the status panel")
+    plot.add_argument("--dpi", type=int, default=100)
+    plot.add_argument("--no-decimate", action="store_true", help="draw every sample")
+    plot.set_defaults(func=command_plot)
+
+    export = commands.add_parser("export", parents=[common], help="convert the logs into a BlueForsLogStore")
+    export.add_argument("--store", required=True, help="store folder")
+    export.set_defaults(func=command_export)
+
+    return parser
+
+
+def main(argv:list=None):
+    arguments = parser()
+    args = arguments.parse_args(argv)
+    if not os.path.isdir(args.folder):
+        arguments.error(f"log folder {args.folder} does not exist")
+    if args.start is not None and args.start > (args.to or date.today()):
+        arguments.error(f"--from {args.start} is after --to {args.to or date.today()}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+# Event detection for bluefors_log_view
+# Find warm-ups, pressure spikes and compressor trips in the loaded channels with
+# vectorized threshold, rolling-statistics and state-change rules.
+
+import numpy as np
+import pandas as pd
+
+from bluefors_log_view import ChannelSeries
+
+
+def _runs(mask:np.ndarray, times:np.ndarray=None, max_gap:np.timedelta64=None):
+    """
+    Return the first and last indexes of the runs of True in mask. With times and max_gap,
+    runs are also split where consecutive samples are more than max_gap apart.
+    """
+    previous = np.concatenate(([False], mask[:-1]))
+    following = np.concatenate((mask[1:], [False]))
+    if max_gap is not None and len(mask) > 1:
+        gap = np.diff(times) > max_gap
+        previous[1:] &= ~gap
+        following[:-1] &= ~gap
+
+    return np.flatnonzero(mask & ~previous), np.flatnonzero(mask & ~following)
+
+
+def _argmax_per_run(score:np.ndarray, starts:np.ndarray, ends:np.ndarray):
+    """ Return the index of the largest score within each run [start, end]. """
+    if len(starts) == 0:
+        return starts
+
+    lengths = ends - starts + 1
+    offsets = np.cumsum(lengths) - lengths
+    index = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+    order = np.lexsort((-score[index], np.repeat(np.arange(len(starts)), lengths)))
+    return index[order[offsets]]
+
+
+def threshold_events(channel:ChannelSeries, above:float=None, below:float=None, min_duration:np.timedelta64=None,
+                     max_gap:np.timedelta64=None):
+    """Find the periods in which a channel is above and/or below a threshold.
+
+    Parameters
+    ----------
+    above, below : float
+        A sample is in an event when it is greater than above or less than below.
+    min_duration : numpy.timedelta64
+        Shorter events are dropped, except one still going on at the last sample.
+    max_gap : numpy.timedelta64
+        An event ends at a gap in the data longer than this.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Index of the first and last sample and peak value of each event; the peak is the
+        sample farthest beyond its threshold.
+    """
+    values = channel.values
+    mask = np.zeros(len(values), dtype=bool)
+    score = np.full(len(values), -np.inf)
+    with np.errstate(invalid='ignore'):
+        if above is not None:
+            mask |= values > above
+            score = np.where(values > above, values - above, score)
+        if below is not None:
+            mask |= values < below
+            score = np.where(values < below, np.maximum(score, below - values), score)
+
+    starts, ends = _runs(mask, channel.times, max_gap)
+    if min_duration is not None:
+        keep = (channel.times[ends] - channel.times[starts] >= min_duration) | (ends == len(values) - 1)
+        starts, ends = starts[keep], ends[keep]
+
+    return starts, ends, values[_argmax_per_run(score, starts, ends)]
+
+
+def spike_events(channel:ChannelSeries, window:np.timedelta64, nsigma:float=5.0, min_samples:int=10,
+                 max_gap:np.timedelta64=None):
+    """Find samples deviating from the trailing rolling mean by more than nsigma standard deviations.
+
+    The mean and standard deviation over the window before each sample come from cumulative
+    sums, so the cost is linear in the number of samples whatever the window.
+
+    Parameters
+    ----------
+    window : numpy.timedelta64
+        Length of the trailing window of the rolling statistics.
+    min_samples : int
+        Samples with fewer valid samples in their window are not tested.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Index of the first and last sample and peak value of each run of deviating samples;
+        the peak is the sample with the largest deviation.
+    """
+    times, values = channel.times, channel.values
+    valid = ~np.isnan(values)
+    reference = np.nanmean(values) if valid.any() else 0.0
+    x = np.where(valid, values - reference, 0.0) # centred, to keep the variance accurate
+
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    squares = np.concatenate(([0.0], np.cumsum(x*x)))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    first = np.searchsorted(times, times - window, side='left')
+    last = np.arange(len(times)) # the window excludes the sample itself
+    n = counts[last] - counts[first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (sums[last] - sums[first])/n
+        std = np.sqrt(np.maximum((squares[last] - squares[first])/n - mean*mean, 0.0))
+
+    # a window of one repeated value has no spread, whatever the rounding of the cumulative sums,
+    # which depends on where the scan starts: count the changes between its valid samples exactly
+    changes = np.concatenate(([0], np.cumsum(np.diff(values[valid]) != 0)))
+    if len(changes) > 1:
+        constant = changes[np.maximum(counts[last] - 1, 0)] == changes[np.minimum(counts[first], len(changes) - 1)]
+        std[constant] = 0.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score = np.abs(x - mean)/std
+
+    mask = valid & (n >= min_samples) & (std > 0) & (score > nsigma)
+    starts, ends = _runs(mask, times, max_gap)
+    return starts, ends, values[_argmax_per_run(np.where(mask, score, -np.inf), starts, ends)]
+
+
+def state_change_events(channel:ChannelSeries, to_value:float=None):
+    """Find the changes of a state channel, e.g. cparun or cpastate.
+
+    Every change starts an event lasting until the last sample before the next change.
+
+    Parameters
+    ----------
+    to_value : float
+        Only keep the changes to this value, e.g. 0 for compressor trips on cparun.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Index of the first and last sample and the new value of each event.
+    """
+    valid = np.flatnonzero(~np.isnan(channel.values))
+    values = channel.values[valid]
+
+    changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+    ends = np.append(changes[1:] - 1, len(values) - 1) if len(changes) else changes
+    if to_value is not None:
+        keep = values[changes] == to_value
+        changes, ends = changes[keep], ends[keep]
+
+    return valid[changes], valid[ends], values[changes]
+
+
+class EventDetector:
+    """ Run a set of detection rules over the channels of a BlueForsLogLoader.
+
+    Example
+    -------
+        detector = EventDetector()
+        detector.add_threshold('temperature', 'MCX', above=0.1, min_duration='10min')  # warm-ups
+        detector.add_spikes('pressure', 'P1', window='1h', nsigma=6)                    # P-spikes
+        detector.add_threshold('status', ('cpahp', 'cpalp'), below=5)                   # delta P drops
+        detector.add_state_changes('status', 'cparun', to_value=0)                      # compressor trips
+        events = detector.detect(loader)
+        ...
+        loader.refresh()
+        events = detector.update(loader)  # only the new samples are scanned
+
+    The events form a DataFrame with the columns start, end, channel, kind and peak.
+    Events still going on at the end of the data are re-examined by update(), which
+    scans the new samples plus the context each rule needs (its rolling window, or the
+    span of the open event), so a year is scanned once and refreshes stay cheap.
+    """
+
+    _columns = ['start', 'end', 'channel', 'kind', 'peak']
+
+    def __init__(self):
+        self.rules = []
+        self._closed = {}  # rule index -> events that can no longer change
+        self._resume = {}  # rule index -> (time of the last sample scanned, start of the open event or None)
+
+    @staticmethod
+    def _timedelta(value):
+        return None if value is None else np.timedelta64(pd.Timedelta(value).to_timedelta64(), 's')
+
+    def add_threshold(self, type:str, name, above:float=None, below:float=None, min_duration=None, max_gap=None):
+        """
+        Add a threshold rule. name is a channel name, or a pair (a, b) for the difference of
+        two channels sharing their times, e.g. ('cpahp', 'cpalp') for the compressor delta P.
+        """
+        self.rules.append({'type': type, 'name': name, 'kind': 'threshold', 'context': None,
+                           'detect': lambda channel: threshold_events(channel, above, below, self._timedelta(min_duration),
+                                                                      self._timedelta(max_gap))})
+
+    def add_spikes(self, type:str, name, window='1h', nsigma:float=5.0, min_samples:int=10, max_gap=None):
+        """ Add a rolling-statistics rule, see spike_events. """
+        self.rules.append({'type': type, 'name': name, 'kind': 'spike', 'context': self._timedelta(window),
+                           'detect': lambda channel: spike_events(channel, self._timedelta(window), nsigma, min_samples,
+                                                                  self._timedelta(max_gap))})
+
+    def add_state_changes(self, type:str, name, to_value:float=None):
+        """ Add a state-change rule, see state_change_events. """
+        self.rules.append({'type': type, 'name': name, 'kind': 'state', 'context': None,
+                           'detect': lambda channel: state_change_events(channel, to_value)})
+
+    @staticmethod
+    def _channel(loader, rule:dict, since=None):
+        """ Return the channel of a rule, with only the samples after since if given. """
+        channels = loader.channels(rule['type']) if since is None else loader.channels_since(rule['type'], since)
+        name = rule['name']
+        if isinstance(name, tuple):
+            if name[0] not in channels or name[1] not in channels:
+                return None
+            a, b = channels[name[0]], channels[name[1]]
+            if len(a) != len(b) or not np.array_equal(a.times, b.times):
+                raise ValueError(f"{name[0]} and {name[1]} do not share their times.")
+            return ChannelSeries(a.times, a.values - b.values)
+        return channels.get(name)
+
+    def _label(self, rule:dict):
+        name = rule['name']
+        return f"{rule['type']}.{'-'.join(name) if isinstance(name, tuple) else name}"
+
+    def detect(self, loader):
+        """ Scan all the data of the loader and return the event table. """
+        self._closed, self._resume = {}, {}
+        return self.update(loader)
+
+    def update(self, loader):
+        """ Scan the samples added since the last call, e.g. after loader.refresh(), and return the event table. """
+        tables = []
+        for i, rule in enumerate(self.rules):
+            first, resume = 0, self._resume.get(i)
+            if resume is None:
+                channel = self._channel(loader, rule)
+            else:
+                last_time, open_start = resume
+                start = last_time if open_start is None else open_start
+                if rule['context'] is not None:
+                    start = start - rule['context']
+                # only the samples from a day before start: the cost follows the new samples, not the history
+                channel = self._channel(loader, rule, since=start - np.timedelta64(1, 'D'))
+                if channel is not None and (len(channel) == 0 or channel.times[0] >= start): # no sample before start
+                    channel = self._channel(loader, rule)
+                if channel is not None:
+                    first = max(np.searchsorted(channel.times, start, side='left') - 1, 0) # one sample before, for changes
+
+            if channel is None or len(channel) == 0:
+                tables.append(self._closed.get(i))
+                continue
+
+            times = channel.times[first:]
+            starts, ends, peaks = rule['detect'](ChannelSeries(times, channel.values[first:]))
+            starts, ends = times[starts], times[ends]
+
+            if resume is not None: # events ending before the open one, or before the previous scan, are in the table
+                keep = ends >= last_time if open_start is not None else starts > last_time
+                starts, ends, peaks = starts[keep], ends[keep], peaks[keep]
+
+            is_open = ends == channel.times[-1]
+            events = pd.DataFrame({'start': starts, 'end': ends, 'channel': self._label(rule),
+                                   'kind': rule['kind'], 'peak': peaks}, columns=self._columns)
+
+            parts = [ table for table in (self._closed.get(i), events[~is_open]) if table is not None and len(table) ]
+            self._closed[i] = pd.concat(parts) if parts else events[~is_open]
+            self._resume[i] = (channel.times[-1], starts[is_open].min() if is_open.any() else None)
+            tables.append(pd.concat([self._closed[i], events[is_open]]) if is_open.any() else self._closed[i])
+
+        tables = [ table for table in tables if table is not None and len(table) ]
+        if not tables:
+            return pd.DataFrame(columns=self._columns)
+        return pd.concat(tables).sort_values('start', kind='stable').reset_index(drop=True)
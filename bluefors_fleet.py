@@ -0,0 +1,131 @@
+# Fleet loading for bluefors_log_view
+# Load the logs of several fridges over one date range with one shared pool of thread or
+# process workers and one shared cache, so the fridges load side by side.
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import date, timedelta
+
+from bluefors_log_view import BlueForsLogCache, BlueForsLogLoader
+
+
+_process_loaders = {} # loaders of a worker process of BlueForsFleetLoader, one per log folder, reused between jobs
+_process_settings = {} # start_date, end_date and loader keyword arguments of the worker process
+
+def _init_process(start_date:date, end_date:date, kwargs:dict):
+    """ Initializer of the worker processes of BlueForsFleetLoader(processes=True). """
+    _process_loaders.clear()
+    _process_settings.update(start_date=start_date, end_date=end_date, kwargs=kwargs)
+
+def _load_day_in_process(log_folder:str, type:str, day:date):
+    """
+    Job of BlueForsFleetLoader(processes=True): parse one day in a worker process and return
+    its channels, the byte offsets of its files and its stats record. The loader of each
+    fridge is built on its first job in the process, with the settings of _init_process.
+    """
+    loader = _process_loaders.get(log_folder)
+    if loader is None:
+        loader = _process_loaders[log_folder] = BlueForsLogLoader(log_folder, _process_settings['start_date'], _process_settings['end_date'],
+                                                                  lazy=True, **_process_settings['kwargs'])
+
+    loader._load_days(type, day, day)
+    file_names = loader._get_full_file_names(day, type)
+    file_names = [file_names] if isinstance(file_names, str) else file_names
+
+    return (loader._days[type].pop(day), { file_name: loader._offsets.pop(file_name) for file_name in file_names if file_name in loader._offsets },
+            loader.stats.pop((day, type), None))
+
+class BlueForsFleetLoader:
+    """ Load the logs of several fridges over one date range.
+
+    The (fridge, type, day) parse jobs of all fridges go to one shared pool of workers and
+    one shared BlueForsLogCache, so the fridges load side by side: the total time is
+    close to that of the slowest fridge rather than the sum of all of them.
+    """
+
+    def __init__(self, log_folders:dict, start_date:date, end_date:date, what_type_to_load:str=None, workers:int=8,
+                 cache_dir:str=None, cache_size_limit:int=2*1024**3, processes:bool=False, **kwargs):
+        """
+        Parameters
+        ----------
+        log_folders : dict
+            Fridge name -> log folder, e.g. {'BF5': bf5_folder, 'BF6': bf6_folder}.
+        what_type_to_load : str
+            Log type to load, or None for all of them.
+        workers : int
+            Number of threads shared by all fridges.
+        cache_dir : str
+            Folder of the BlueForsLogCache shared by all fridges.
+        processes : bool
+            If True, the days are parsed in worker processes instead of threads. Threads suit
+            folders on a network share, where the time is spent waiting for files; processes
+            also run the parsing itself in parallel, for folders on a local disk.
+
+        The other keyword arguments are passed to every BlueForsLogLoader.
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cache = BlueForsLogCache(cache_dir, cache_size_limit) if cache_dir is not None else None
+
+        if what_type_to_load is None:
+            types = BlueForsLogLoader.log_types
+        elif what_type_to_load in BlueForsLogLoader.log_types:
+            types = [what_type_to_load]
+        else:
+            raise Exception("Not supported type!")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = { name: executor.submit(BlueForsLogLoader, log_folder, start_date, end_date, lazy=True, **kwargs)
+                        for name, log_folder in log_folders.items() }
+            self.loaders = { name: future.result() for name, future in futures.items() }
+            for loader in self.loaders.values():
+                loader.cache = self.cache
+
+        num_days = (end_date - start_date).days + 1
+        dates = [ start_date + timedelta(days=i) for i in range(num_days) ]
+
+        if processes:
+            if cache_dir is not None:
+                kwargs.update(cache_dir=cache_dir, cache_size_limit=cache_size_limit)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(start_date, end_date, kwargs)) as executor:
+                jobs = { (loader, type, day): executor.submit(_load_day_in_process, loader.log_folder, type, day)
+                         for loader in self.loaders.values() for type in types for day in dates }
+                for (loader, type, day), job in jobs.items():
+                    channels, offsets, stats = job.result()
+                    loader._days[type][day] = channels
+                    loader._offsets.update(offsets)
+                    if stats is not None:
+                        loader.stats[(day, type)] = stats
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                jobs = [ executor.submit(loader._load_days, type, day, day)
+                         for loader in self.loaders.values() for type in types for day in dates ]
+                for job in jobs:
+                    job.result()
+
+        for loader in self.loaders.values():
+            for type in types:
+                loader.channels(type)
+
+    def __getitem__(self, name:str):
+        return self.loaders[name]
+
+    def __iter__(self):
+        return iter(self.loaders)
+
+    def __len__(self):
+        return len(self.loaders)
+
+    def items(self):
+        return self.loaders.items()
+
+    def channels(self, type:str):
+        """ Return {fridge: {name: ChannelSeries}} of a log type. """
+        return { name: loader.channels(type) for name, loader in self.loaders.items() }
+
+    def aligned(self, freq:str='1min', how:str='mean', types:list=None, tolerance:str=None):
+        """ Return {fridge: DataFrame} of BlueForsLogLoader.aligned. """
+        return { name: loader.aligned(freq, how, types, tolerance) for name, loader in self.loaders.items() }
+
+    def derived(self, name:str):
+        """ Return {fridge: ChannelSeries} of BlueForsLogLoader.derived. """
+        return { fridge: loader.derived(name) for fridge, loader in self.loaders.items() }
@@ -2,40 +2,1402 @@
 # Read Bluefors log files and plot them 
 
 import os
+import io
+import ast
+import re
+import mmap
+import time
+import copy
+import json
+import pstats
+import cProfile
+import logging
+import itertools
+import functools
+import contextlib
+import hashlib
+import tempfile
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger("bluefors_log_view")
+
+def _profiled(func):
+    """Run func under cProfile and/or tracemalloc when the BLUEFORS_PROFILE environment variable asks for it.
+
+    BLUEFORS_PROFILE is a comma separated list of 'cprofile' and 'tracemalloc'. The hot spots are
+    printed after the call; with BLUEFORS_PROFILE_DIR set, the cProfile statistics are also dumped
+    there as a .prof file for snakeviz or pstats.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        modes = [ mode.strip().lower() for mode in os.environ.get("BLUEFORS_PROFILE", "").split(",") if mode.strip() ]
+        if not modes:
+            return func(*args, **kwargs)
+
+        profiler = cProfile.Profile() if "cprofile" in modes else None
+        trace = "tracemalloc" in modes and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            name = func.__qualname__
+            if profiler is not None:
+                profiler.disable()
+                print(f"\n##### cProfile of {name} #####")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+                profile_dir = os.environ.get("BLUEFORS_PROFILE_DIR")
+                if profile_dir:
+                    os.makedirs(profile_dir, exist_ok=True)
+                    profiler.dump_stats(os.path.join(profile_dir, f"{name} {datetime.now():%y-%m-%d %H%M%S}.prof"))
+            if trace:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"\n##### tracemalloc of {name}: peak {peak/2**20:.1f} MB #####")
+                for stat in snapshot.statistics("lineno")[:10]:
+                    print(stat)
+
+    return wrapper
+
+def parse_datetimes(dates, times):
+    """Decode Bluefors 'dd-mm-yy' dates and 'HH:MM:SS' times into datetime64[s].
+
+    The fixed-width fields are decoded as bytes in one vectorized pass, without string
+    concatenation or format guessing. A leading space in the dates, as written by the
+    CH* and Flowmeter logs, is detected once from the first entry.
+
+    Parameters
+    ----------
+    dates, times : array-like of str or bytes
+        Date and time columns of a log file.
+
+    Returns
+    -------
+    numpy.ndarray
+        datetime64[s] array.
+    """
+    dates = np.asarray(dates).astype('S9')
+    times = np.asarray(times).astype('S8')
+
+    if len(dates) == 0:
+        return np.array([], dtype='datetime64[s]')
+
+    d = dates.view(np.uint8).reshape(-1, 9)
+    d = d[:, 1:] if d[0, 0] == ord(' ') else d[:, :8]
+    t = times.view(np.uint8).reshape(-1, 8)
+
+    return _decode_datetimes(d, t)
+
+def _decode_datetimes(d:np.ndarray, t:np.ndarray):
+    """ Decode (n, 8) uint8 arrays of 'dd-mm-yy' and 'HH:MM:SS' characters into datetime64[s]. """
+    if ((d[:, [2, 5]] != ord('-')).any() or (t[:, [2, 5]] != ord(':')).any()):
+        raise ValueError("Datetimes do not match the 'dd-mm-yy,HH:MM:SS' format.")
+
+    d = d.astype(np.int64) - ord('0')
+    t = t.astype(np.int64) - ord('0')
+
+    digits = np.concatenate([d[:, [0, 1, 3, 4, 6, 7]], t[:, [0, 1, 3, 4, 6, 7]]], axis=1)
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError("Datetimes do not match the 'dd-mm-yy,HH:MM:SS' format.")
+
+    day = d[:, 0]*10 + d[:, 1]
+    month = d[:, 3]*10 + d[:, 4]
+    year = 2000 + d[:, 6]*10 + d[:, 7]
+    seconds = (t[:, 0]*10 + t[:, 1])*3600 + (t[:, 3]*10 + t[:, 4])*60 + t[:, 6]*10 + t[:, 7]
+
+    months = ((year - 1970)*12 + month - 1).astype('datetime64[M]')
+    return (months.astype('datetime64[D]') + (day - 1)).astype('datetime64[s]') + seconds
+
+_powers_of_ten = np.array([ float(10**k) for k in range(23) ]) # exactly representable
+
+def _decode_scientific(chars:np.ndarray):
+    """
+    Decode (n, width) uint8 rows of unsigned 'd.dddE+dd' numbers, all laid out alike, e.g.
+    as written with '%.2E'. The mantissa digits form an exact integer that is scaled by an
+    exact power of ten in one rounding step, so the result equals float() of the text.
+    Return None if the rows do not all have this layout.
+    """
+    n, width = chars.shape
+    marks = np.flatnonzero((chars[0] == ord('E')) | (chars[0] == ord('e')))
+    if len(marks) != 1 or width < 5 or chars[0, 1] != ord('.'):
+        return None
+    e = int(marks[0])
+    if e + 2 >= width or e - 1 > 15: # mantissas of up to 15 digits are exact in float64
+        return None
+
+    digit_columns = np.r_[0, 2:e, e + 2:width]
+    digits = chars[:, digit_columns].astype(np.int64) - ord('0')
+    if not (((digits >= 0) & (digits <= 9)).all() and (chars[:, 1] == ord('.')).all()
+            and ((chars[:, e] == ord('E')) | (chars[:, e] == ord('e'))).all()
+            and ((chars[:, e + 1] == ord('+')) | (chars[:, e + 1] == ord('-'))).all()):
+        return None
+
+    mantissa = np.zeros(n, dtype=np.int64)
+    for column in range(e - 1):
+        mantissa = mantissa*10 + digits[:, column]
+    exponent = np.zeros(n, dtype=np.int64)
+    for column in range(e - 1, digits.shape[1]):
+        exponent = exponent*10 + digits[:, column]
+
+    scale = np.where(chars[:, e + 1] == ord('-'), -exponent, exponent) - (e - 2)
+    if (np.abs(scale) >= len(_powers_of_ten)).any():
+        return None
+    power = _powers_of_ten[np.abs(scale)]
+    mantissa = mantissa.astype(float)
+    return np.where(scale >= 0, mantissa*power, mantissa/power)
+
+def _to_float(tokens):
+    """ Convert byte string tokens to float64, with NaN for tokens that are not numbers. """
+    tokens = np.asarray(tokens)
+    if tokens.dtype.kind == 'S' and tokens.ndim == 1 and len(tokens):
+        values = _decode_scientific(np.ascontiguousarray(tokens).view(np.uint8).reshape(len(tokens), -1))
+        if values is not None:
+            return values
+    try:
+        return tokens.astype(float)
+    except ValueError:
+        def to_float(token):
+            try:
+                return float(token)
+            except ValueError:
+                return np.nan
+        return np.array([ to_float(token) for token in tokens.ravel() ], dtype=float).reshape(tokens.shape)
+
+def parse_channel_buffer(buffer, start:int=0, end:int=None, block_size:int=1<<18):
+    """Tokenize the 'dd-mm-yy,HH:MM:SS,value' lines of a CH* or Flowmeter log in place.
+
+    The buffer, e.g. a mmap of the file, is scanned in blocks of about block_size bytes
+    with NumPy only: newlines are located, the fixed-width date and time characters are
+    gathered at fixed offsets from the line starts, and the values are converted from a
+    fixed-width bytes view. The results are written into arrays preallocated for the
+    number of lines, so no Python object is created per line and the temporary memory
+    is bounded by the block size. Lines may start with a space; blank lines are skipped.
+
+    Parameters
+    ----------
+    buffer : buffer
+        Bytes, mmap or any object supporting the buffer protocol.
+    start, end : int
+        Byte range to parse. Only lines ending with a newline before end are parsed.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        datetime64[s] times and float64 values.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(data) if end is None else end
+
+    num_lines = sum(np.count_nonzero(data[i:min(i + block_size, end)] == ord('\n')) for i in range(start, end, block_size))
+    times = np.empty(num_lines, dtype='datetime64[s]')
+    values = np.empty(num_lines)
+
+    count = 0
+    while start < end:
+        stop = min(start + block_size, end)
+        newlines = np.flatnonzero(data[start:stop] == ord('\n'))
+        while len(newlines) == 0 and stop < end: # a line longer than the block
+            stop = min(stop + block_size, end)
+            newlines = np.flatnonzero(data[start:stop] == ord('\n'))
+        if len(newlines) == 0:
+            break
+
+        block = data[start:start + newlines[-1] + 1]
+        start += newlines[-1] + 1
+
+        line_starts = np.concatenate(([0], newlines[:-1] + 1))
+        line_ends = newlines - (block[np.maximum(newlines - 1, 0)] == ord('\r'))
+        line_starts += block[line_starts] == ord(' ')
+        keep = line_ends - line_starts >= 19 # 'dd-mm-yy,HH:MM:SS,' and at least one character
+        line_starts, line_ends = line_starts[keep], line_ends[keep]
+        if len(line_starts) == 0:
+            continue
+
+        if (block[line_starts + 8] != ord(',')).any() or (block[line_starts + 17] != ord(',')).any():
+            raise ValueError("Lines do not match the 'dd-mm-yy,HH:MM:SS,value' format.")
+
+        offsets = np.arange(8)
+        d = block[line_starts[:, None] + offsets]
+        t = block[line_starts[:, None] + 9 + offsets]
+
+        width = int((line_ends - line_starts).max()) - 18
+        index = line_starts[:, None] + 18 + np.arange(width)
+        chars = np.where(index < line_ends[:, None], block[np.minimum(index, len(block) - 1)], 0).astype(np.uint8)
+        chars[np.cumsum(chars == ord(','), axis=1) > 0] = 0 # only the third field
+
+        n = len(line_starts)
+        times[count:count + n] = _decode_datetimes(d, t)
+        values[count:count + n] = _to_float(chars.view(f'S{width}').ravel())
+        count += n
+
+    return times[:count], values[:count]
+
+def _gather_fields(data:np.ndarray, starts:np.ndarray, ends:np.ndarray):
+    """ Return the bytes data[starts[i]:ends[i]] of every field as one fixed-width bytes array. """
+    width = max(int((ends - starts).max()), 1) if len(starts) else 1
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate((data, np.zeros(width, dtype=np.uint8))), width)
+    chars = windows[starts] # copies one row of width bytes per field
+    chars[np.arange(width) >= (ends - starts)[:, None]] = 0
+    return chars.view(f'S{width}').ravel()
+
+def _unique_fields(fields:np.ndarray):
+    """
+    np.unique(fields, return_index=True, return_inverse=True) of a fixed-width bytes array,
+    for fields with few distinct values such as the keys of a Status_ log. The fields are
+    grouped by a hash of their bytes, which sorts much faster than the strings, and the
+    grouping is checked against the bytes.
+    """
+    chars = fields.view(np.uint8).reshape(len(fields), -1)
+    words = np.zeros((len(fields), -(-chars.shape[1]//8)*8), dtype=np.uint8)
+    words[:, :chars.shape[1]] = chars
+    hashes = np.zeros(len(fields), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for word in words.view(np.uint64).T:
+            hashes = (hashes ^ word)*np.uint64(0x100000001b3)
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    if not (fields[first][inverse] == fields).all(): # a collision, which is astronomically rare
+        return np.unique(fields, return_index=True, return_inverse=True)
+
+    order = np.argsort(fields[first]) # sorted like np.unique
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return fields[first][order], first[order], rank[inverse]
+
+def _to_small_int(tokens:np.ndarray):
+    """ Convert fixed-width byte string tokens of unsigned integers, e.g. b' 1', to int64 with digit arithmetic. """
+    chars = tokens.view(np.uint8).reshape(len(tokens), -1)
+    digits = (chars >= ord('0')) & (chars <= ord('9'))
+    if not ((digits | (chars == ord(' ')) | (chars == 0)).all() and digits.any(axis=1).all()):
+        return _to_float(tokens) # signs, decimals or garbage: let the general conversion decide
+
+    values = np.zeros(len(tokens), dtype=np.int64)
+    for column in range(chars.shape[1]):
+        values = np.where(digits[:, column], values*10 + chars[:, column] - ord('0'), values)
+    return values
+
+def parse_maxigauge_buffer(buffer, start:int=0, end:int=None, block_size:int=1<<18):
+    """Decode the lines of a maxigauge log gauge by gauge.
+
+    Every line is 'dd-mm-yy,HH:MM:SS,' followed by one 6-field group per gauge,
+    'CHn,name,state,pressure,status,...', where state is 1 if the gauge is on and status
+    is the gauge status code, 0 for a valid reading. Groups are matched by their CHn
+    label, not by position, so lines with fewer, more or reordered gauges are read
+    correctly. The buffer is scanned in blocks of about block_size bytes: the commas of
+    all lines are located at once and only the label, state, pressure and status fields
+    are gathered and converted, grouped by number of fields.
+
+    Parameters
+    ----------
+    buffer : buffer
+        Bytes, mmap or any object supporting the buffer protocol.
+    start, end : int
+        Byte range to parse. Only lines ending with a newline before end are parsed.
+
+    Returns
+    -------
+    (numpy.ndarray, dict)
+        datetime64[s] times and {n: {'name': str, 'pressure': float64, 'state': int8,
+        'status': int8}} per gauge CHn. Lines without a group for a gauge have a NaN
+        pressure, state 0 and status -1. The name is the first non-blank gauge name.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(data) if end is None else end
+
+    blocks = []
+    while start < end:
+        stop = min(start + block_size, end)
+        last = data[start:stop].tobytes().rfind(b'\n')
+        while last < 0 and stop < end: # a line longer than the block
+            stop = min(stop + block_size, end)
+            last = data[start:stop].tobytes().rfind(b'\n')
+        if last < 0:
+            break
+
+        blocks.append(_parse_maxigauge_block(data[start:start + last + 1]))
+        start += last + 1
+
+    numbers = sorted(set(number for _, gauges in blocks for number in gauges))
+    times = np.concatenate([ times for times, _ in blocks ]) if blocks else np.array([], dtype='datetime64[s]')
+
+    result = {}
+    for number in numbers:
+        parts = [ gauges.get(number) or {'name': '', 'pressure': np.full(len(times), np.nan),
+                                         'state': np.zeros(len(times), dtype=np.int8),
+                                         'status': np.full(len(times), -1, dtype=np.int8)}
+                  for times, gauges in blocks ]
+        result[number] = {'name': next((part['name'] for part in parts if part['name']), '')}
+        for field in ['pressure', 'state', 'status']:
+            result[number][field] = np.concatenate([ part[field] for part in parts ])
+
+    return times, result
+
+def _parse_maxigauge_block(block:np.ndarray):
+    """ Parse the complete lines of a block of a maxigauge log, see parse_maxigauge_buffer. """
+    newlines = np.flatnonzero(block == ord('\n'))
+    gauges = {}
+
+    # lines written with fixed-width fields, as Bluefors does, all have their commas in the
+    # same columns: the block is then a (lines, width) array and the fields are column slices
+    stride = int(newlines[0]) + 1
+    rows = block.reshape(-1, stride) if len(block) == stride*len(newlines) else None
+    if rows is not None and stride >= 19:
+        columns = np.flatnonzero(rows[0] == ord(','))
+        if not (len(columns) >= 2 and columns[0] >= 8 and (rows[:, stride - 1] == ord('\n')).all()
+                and ((rows == ord(',')).sum(axis=1) == len(columns)).all() and (rows[:, columns] == ord(',')).all()):
+            rows = None
+    else:
+        rows = None
+
+    if rows is not None:
+        n = len(rows)
+        line_end = stride - 1 - (rows[0, stride - 2] == ord('\r'))
+        times = _decode_datetimes(rows[:, columns[0] - 8:columns[0]], rows[:, columns[0] + 1:columns[0] + 9])
+        bounds = np.append(columns, line_end)
+
+        def fields(index:int): # field k + 1 is between commas k and k + 1
+            field = np.ascontiguousarray(rows[:, bounds[index - 1] + 1:bounds[index]])
+            return field.view(f'S{max(field.shape[1], 1)}').ravel() if field.shape[1] else np.zeros(n, dtype='S1')
+
+        layouts = [ (np.arange(n), len(columns), fields) ]
+    else:
+        line_starts = np.concatenate(([0], newlines[:-1] + 1))
+        line_ends = newlines - (block[np.maximum(newlines - 1, 0)] == ord('\r'))
+        line_starts += block[np.minimum(line_starts, len(block) - 1)] == ord(' ')
+        keep = line_ends - line_starts >= 18 # 'dd-mm-yy,HH:MM:SS,'
+        line_starts, line_ends = line_starts[keep], line_ends[keep]
+
+        n = len(line_starts)
+        if n == 0:
+            return np.array([], dtype='datetime64[s]'), gauges
+
+        offsets = np.arange(8)
+        times = _decode_datetimes(block[line_starts[:, None] + offsets], block[line_starts[:, None] + 9 + offsets])
+
+        commas = np.flatnonzero(block == ord(','))
+        line_of_comma = np.searchsorted(line_starts, commas, side='right') - 1
+        inside = (line_of_comma >= 0) & (commas < line_ends[np.maximum(line_of_comma, 0)])
+        commas, line_of_comma = commas[inside], line_of_comma[inside]
+        num_commas = np.bincount(line_of_comma, minlength=n)
+        first_comma = np.cumsum(num_commas) - num_commas
+
+        layouts = []
+        for count in np.unique(num_commas):
+            lines = np.flatnonzero(num_commas == count)
+            positions = commas[first_comma[lines][:, None] + np.arange(count)]
+            field_starts = positions + 1
+            field_ends = np.concatenate((positions[:, 1:], line_ends[lines][:, None]), axis=1)
+
+            def fields(index:int, field_starts=field_starts, field_ends=field_ends):
+                return _gather_fields(block, field_starts[:, index - 1], field_ends[:, index - 1])
+
+            layouts.append((lines, int(count), fields))
+
+    for lines, count, fields in layouts:
+        num_groups = (count - 1)//6 # a trailing comma after the last group is optional
+        for group in range(num_groups):
+            labels = fields(2 + 6*group)
+            state = _to_small_int(fields(4 + 6*group))
+            pressure = _to_float(fields(5 + 6*group))
+            status = _to_small_int(fields(6 + 6*group))
+
+            for label in np.unique(labels):
+                token = label.strip()
+                if not token.startswith(b'CH') or not token[2:].isdigit():
+                    continue
+
+                number = int(token[2:])
+                if number not in gauges:
+                    gauges[number] = {'name': '', 'pressure': np.full(n, np.nan),
+                                      'state': np.zeros(n, dtype=np.int8), 'status': np.full(n, -1, dtype=np.int8)}
+                gauge = gauges[number]
+
+                mask = labels == label
+                everywhere = len(lines) == n and mask.all()
+                rows_of = slice(None) if everywhere else lines[mask]
+                pick = (lambda values: values) if everywhere else (lambda values: values[mask])
+                gauge['pressure'][rows_of] = pick(pressure)
+                gauge['state'][rows_of] = np.nan_to_num(pick(state), nan=0)
+                gauge['status'][rows_of] = np.nan_to_num(pick(status), nan=-1)
+                if not gauge['name']:
+                    names = pick(fields(3 + 6*group))
+                    chars = names.view(np.uint8).reshape(len(names), -1)
+                    named = np.flatnonzero(((chars != ord(' ')) & (chars != 0)).any(axis=1))
+                    if len(named):
+                        gauge['name'] = names[named[0]].strip().decode(errors='replace')
+
+    return times, gauges
+
+def parse_status_buffer(buffer, start:int=0, end:int=None, keys:list=None, block_size:int=1<<18):
+    """Decode the 'date,time,key,value,key,value,...' lines of a Status_ log in place.
+
+    Values are matched by key name, so lines with extra, missing or reordered pairs, as
+    written by XLD systems with two compressors, are read correctly. The buffer, e.g. a
+    mmap of the file, is scanned in blocks of about block_size bytes with NumPy only: the
+    commas of all lines are located at once, lines with the same number of fields are
+    handled together, and only the values of wanted keys are gathered and converted. The
+    values are written into columns preallocated for the number of lines, so the temporary
+    memory is bounded by the block size. Blank lines are skipped.
+
+    Parameters
+    ----------
+    buffer : buffer
+        Bytes, mmap or any object supporting the buffer protocol.
+    start, end : int
+        Byte range to parse. Only lines ending with a newline before end are parsed.
+    keys : list
+        Status keys to keep, e.g. ['cpalp', 'cpahp']. All keys if None.
+
+    Returns
+    -------
+    (numpy.ndarray, dict)
+        datetime64[s] times and {key: float64 values}, NaN where a line has no value for the
+        key, with the keys in the order in which they first appear, or those of keys.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(data) if end is None else end
+    wanted = None if keys is None else set(key.encode() for key in keys)
+
+    num_lines = sum(np.count_nonzero(data[i:min(i + block_size, end)] == ord('\n')) for i in range(start, end, block_size))
+    times = np.empty(num_lines, dtype='datetime64[s]')
+    columns, first = {}, {} # key -> values, (line, position) of its first appearance
+
+    count = 0
+    while start < end:
+        stop = min(start + block_size, end)
+        newlines = np.flatnonzero(data[start:stop] == ord('\n'))
+        while len(newlines) == 0 and stop < end: # a line longer than the block
+            stop = min(stop + block_size, end)
+            newlines = np.flatnonzero(data[start:stop] == ord('\n'))
+        if len(newlines) == 0:
+            break
+
+        block = data[start:start + newlines[-1] + 1]
+        start += newlines[-1] + 1
+
+        line_starts = np.concatenate(([0], newlines[:-1] + 1))
+        line_ends = newlines - (block[np.maximum(newlines - 1, 0)] == ord('\r'))
+        line_starts += block[np.minimum(line_starts, len(block) - 1)] == ord(' ')
+        keep = line_ends - line_starts >= 17 # 'dd-mm-yy,HH:MM:SS'
+        line_starts, line_ends = line_starts[keep], line_ends[keep]
+        n = len(line_starts)
+        if n == 0:
+            continue
+
+        offsets = np.arange(8)
+        times[count:count + n] = _decode_datetimes(block[line_starts[:, None] + offsets], block[line_starts[:, None] + 9 + offsets])
+
+        commas = np.flatnonzero(block == ord(','))
+        line_of_comma = np.searchsorted(line_starts, commas, side='right') - 1
+        inside = (line_of_comma >= 0) & (commas < line_ends[np.maximum(line_of_comma, 0)])
+        commas, line_of_comma = commas[inside], line_of_comma[inside]
+        num_commas = np.bincount(line_of_comma, minlength=n)
+        first_comma = np.cumsum(num_commas) - num_commas
+
+        # all the pairs of the block at once: the key follows comma k = 1, 3, 5, ... of its
+        # line and ends at comma k + 1, the value ends at comma k + 2 or at the end of the line
+        k = np.arange(len(commas)) - first_comma[line_of_comma]
+        pairs = np.flatnonzero((k % 2 == 1) & (k + 1 < num_commas[line_of_comma]))
+        if len(pairs) == 0:
+            count += n
+            continue
+        pair_lines = line_of_comma[pairs]
+        value_ends = np.where(k[pairs] + 2 < num_commas[pair_lines], commas[np.minimum(pairs + 2, len(commas) - 1)], line_ends[pair_lines])
+
+        labels = _gather_fields(block, commas[pairs] + 1, commas[pairs + 1])
+        block_keys, first_pair, key_of_pair = _unique_fields(labels)
+        use = np.array([ bool(key) and (wanted is None or key in wanted) for key in block_keys ])
+        selected = np.flatnonzero(use[key_of_pair])
+        if len(selected) == 0:
+            count += n
+            continue
+
+        values = _to_float(_gather_fields(block, commas[pairs[selected] + 1] + 1, value_ends[selected]))
+        selected_keys, selected_lines = key_of_pair[selected], count + pair_lines[selected]
+        for index in np.flatnonzero(use):
+            key = block_keys[index].tobytes()
+            if key not in columns:
+                columns[key] = np.full(num_lines, np.nan)
+            position = (count + int(pair_lines[first_pair[index]]), int(k[pairs[first_pair[index]]]))
+            first[key] = min(first.get(key, position), position)
+            rows = selected_keys == index # in line order, so a repeated key's last value wins
+            columns[key][selected_lines[rows]] = values[rows]
+
+        count += n
+
+    if keys is not None: # every wanted key, in the given order
+        return times[:count], { key: columns[key.encode()][:count] if key.encode() in columns else np.full(count, np.nan)
+                                for key in keys }
+    return times[:count], { key.decode(): columns[key][:count] for key in sorted(columns, key=first.get) }
+
+def iter_status_chunks(f, keys:list=None, chunksize:int=10000):
+    """Parse a Status_ log in chunks of lines, keeping only the wanted keys.
+
+    Each chunk is decoded with parse_status_buffer, so only one chunk of the file is in
+    memory at a time.
+
+    Parameters
+    ----------
+    f : file
+        Binary file object of a Status_ log.
+    keys : list
+        Status keys to keep, e.g. ['cpalp', 'cpahp']. All keys if None.
+    chunksize : int
+        Number of lines parsed at once.
+
+    Yields
+    ------
+    (numpy.ndarray, dict)
+        datetime64[s] times of the chunk and {key: float64 values}, NaN where a line
+        has no value for the key.
+    """
+    while True:
+        lines = list(itertools.islice(f, chunksize))
+        if not lines:
+            break
+        if not lines[-1].endswith(b'\n'):
+            lines[-1] += b'\n'
+        yield parse_status_buffer(b''.join(lines), keys=keys)
+
+def downsample_m4(x, y, num_buckets:int):
+    """Reduce a line to the first, minimum, maximum and last point of each x bucket (M4).
+
+    x is split into num_buckets equal-width buckets, typically one per pixel column.
+    The drawn line of the kept points looks the same as that of all points, so narrow
+    spikes such as pressure bursts survive. Runs of NaN y values, e.g. while a gauge is
+    off, end a bucket and are kept as one NaN point, so the line still breaks there.
+    Points with a NaN or NaT x are dropped. Short lines are returned unchanged.
+
+    Parameters
+    ----------
+    x : array-like
+        Sorted datetime64 or numeric x values.
+    y : array-like
+        Numeric y values.
+    num_buckets : int
+        Number of x buckets.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        At most 4*num_buckets x and y values, plus 5 per run of NaN y values.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= 4*num_buckets:
+        return x, y
+
+    x_int = x.view(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x.astype(float)
+    known = ~np.isnat(x) if np.issubdtype(x.dtype, np.datetime64) else ~np.isnan(x_int)
+    x, y, x_int = x[known], y[known], x_int[known]
+
+    if (np.diff(x_int) < 0).any():
+        order = np.argsort(x_int, kind='stable')
+        x, y, x_int = x[order], y[order], x_int[order]
+
+    gap = np.isnan(y)
+    gap_starts = np.flatnonzero(gap & ~np.r_[False, gap[:-1]]) # first NaN of each run, kept as a line break
+    valid = np.flatnonzero(~gap)
+    if len(valid) == 0:
+        return x[gap_starts], y[gap_starts]
+    part = np.cumsum(gap)[valid] # points between the same two NaN runs
+    y_valid, x_valid = y[valid], x_int[valid]
+
+    x_min, x_max = x_valid[0], x_valid[-1]
+    bucket = ((x_valid - x_min).astype(float) * num_buckets / (x_max - x_min + 1)).astype(np.int64)
+
+    starts = np.flatnonzero(np.r_[True, (bucket[1:] != bucket[:-1]) | (part[1:] != part[:-1])])
+    ends = np.r_[starts[1:], len(y_valid)] - 1
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(y_valid)]))
+
+    kept = [starts, ends]
+    for reduce in (np.minimum, np.maximum):
+        extreme = reduce.reduceat(y_valid, starts)
+        hits = np.flatnonzero(y_valid == extreme[segment])
+        kept.append(hits[np.unique(segment[hits], return_index=True)[1]]) # first hit of each bucket
+
+    index = np.union1d(valid[np.concatenate(kept)], gap_starts)
+    return x[index], y[index]
+
+class ChannelSeries:
+    """ Samples of one channel: datetime64[s] times in increasing order and float values.
+
+    Channels logged in the same file, e.g. the six maxigauge readings, share one
+    times array instead of holding a copy each.
+    """
+
+    __slots__ = ('times', 'values')
+
+    def __init__(self, times:np.ndarray, values:np.ndarray):
+        self.times = times
+        self.values = values
+
+    def __len__(self):
+        return len(self.times)
+
+    def between(self, start=None, end=None):
+        """
+        Return the samples with start <= time < end as views, found by binary search.
+        """
+        i = 0 if start is None else np.searchsorted(self.times, np.datetime64(start, 's'), side='left')
+        j = len(self.times) if end is None else np.searchsorted(self.times, np.datetime64(end, 's'), side='left')
+        return ChannelSeries(self.times[i:j], self.values[i:j])
+
+    def resample(self, grid:np.ndarray, step:np.timedelta64, how:str='mean', tolerance:np.timedelta64=None):
+        """
+        Return the values of the channel on a regular time grid.
+
+        Parameters
+        ----------
+        grid : numpy.ndarray
+            datetime64[s] start times of the bins, spaced by step.
+        step : numpy.timedelta64
+            Bin width.
+        how : str
+            'mean' of the samples in each bin, 'last' sample in each bin, or 'asof',
+            the last sample at or before each grid time.
+        tolerance : numpy.timedelta64
+            For 'asof', samples older than this are not used.
+
+        Returns
+        -------
+        numpy.ndarray
+            float64 values, NaN for bins without samples.
+        """
+        result = np.full(len(grid), np.nan)
+        if len(self.times) == 0 or len(grid) == 0:
+            return result
+
+        if how == 'mean':
+            bins = (self.times - grid[0]) // step
+            valid = (bins >= 0) & (bins < len(grid)) & ~np.isnan(self.values)
+            sums = np.bincount(bins[valid], weights=self.values[valid], minlength=len(grid))
+            counts = np.bincount(bins[valid], minlength=len(grid))
+            np.divide(sums, counts, out=result, where=counts > 0)
+        elif how == 'last':
+            last = np.searchsorted(self.times, grid + step, side='left') - 1
+            valid = (last >= 0) & (self.times[np.maximum(last, 0)] >= grid)
+            result[valid] = self.values[last[valid]]
+        elif how == 'asof':
+            last = np.searchsorted(self.times, grid, side='right') - 1
+            valid = last >= 0
+            if tolerance is not None:
+                valid &= grid - self.times[np.maximum(last, 0)] <= tolerance
+            result[valid] = self.values[last[valid]]
+        else:
+            raise ValueError(f"Unknown resampling method '{how}'!")
+
+        return result
+
+    def to_series(self, name:str=None):
+        """
+        Return the samples as a pandas Series with a DatetimeIndex.
+        """
+        return pd.Series(self.values, index=pd.DatetimeIndex(self.times), name=name)
+
+    @staticmethod
+    def concat_channels(days:list):
+        """
+        Concatenate {name: ChannelSeries} dicts, e.g. of consecutive days, channel by channel.
+        Channels sharing their times in every dict also share the concatenated times.
+        """
+        names = list(dict.fromkeys(name for day in days for name in day))
+
+        channels, shared_times = {}, {}
+        for name in names:
+            parts = [ day[name] for day in days if name in day ]
+            if len(parts) == 1:
+                channels[name] = parts[0]
+                continue
+
+            key = tuple(id(part.times) for part in parts)
+            if key not in shared_times:
+                shared_times[key] = np.concatenate([ part.times for part in parts ])
+            channels[name] = ChannelSeries(shared_times[key], np.concatenate([ part.values for part in parts ]))
+
+        return channels
+
+class ChannelRollup:
+    """ Minimum, mean, maximum and number of the samples of a channel per time bin.
+
+    times holds the datetime64[s] start of each bin; bins without samples are left out.
+    """
+
+    __slots__ = ('times', 'min', 'mean', 'max', 'count')
+
+    _stats = ('min', 'mean', 'max', 'count')
+
+    def __init__(self, times:np.ndarray, min:np.ndarray, mean:np.ndarray, max:np.ndarray, count:np.ndarray):
+        self.times = times
+        self.min = min
+        self.mean = mean
+        self.max = max
+        self.count = count
+
+    def __len__(self):
+        return len(self.times)
+
+    @staticmethod
+    def _bin_starts(times:np.ndarray, step:int):
+        """ Return the bin of each time and the indexes where a new bin starts. """
+        bins = times.astype(np.int64) // step
+        return bins, np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+
+    @classmethod
+    def from_channel(cls, channel:ChannelSeries, step:int):
+        """ Roll up the valid samples of a channel into bins of step seconds. """
+        valid = ~np.isnan(channel.values) & ~np.isnat(channel.times)
+        times, values = channel.times[valid], channel.values[valid].astype(float) # int flags would overflow the sums
+        if len(times) == 0:
+            return cls(np.array([], dtype='datetime64[s]'), *(np.array([]) for _ in range(3)), np.array([], dtype=np.int64))
+        if (np.diff(times.astype(np.int64)) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+
+        bins, starts = cls._bin_starts(times, step)
+        count = np.diff(np.append(starts, len(times)))
+        return cls((bins[starts]*step).astype('datetime64[s]'), np.minimum.reduceat(values, starts),
+                   np.add.reduceat(values, starts)/count, np.maximum.reduceat(values, starts), count)
+
+    def coarsen(self, step:int):
+        """ Combine the bins into coarser bins of step seconds, a multiple of the current step. """
+        if len(self) == 0:
+            return self
+
+        bins, starts = self._bin_starts(self.times, step)
+        count = np.add.reduceat(self.count, starts)
+        return ChannelRollup((bins[starts]*step).astype('datetime64[s]'), np.minimum.reduceat(self.min, starts),
+                             np.add.reduceat(self.mean*self.count, starts)/count, np.maximum.reduceat(self.max, starts), count)
+
+    def between(self, start=None, end=None):
+        """ Return the bins starting at or after start and before end, as views. """
+        i = 0 if start is None else np.searchsorted(self.times, np.datetime64(start, 's'), side='left')
+        j = len(self.times) if end is None else np.searchsorted(self.times, np.datetime64(end, 's'), side='left')
+        return ChannelRollup(*(getattr(self, name)[i:j] for name in self.__slots__))
+
+    def envelope(self):
+        """ Return x, y tracing the minimum and maximum of every bin, for plotting. """
+        return np.repeat(self.times, 2), np.stack([self.min, self.max], axis=1).ravel()
+
+    @staticmethod
+    def concat_rollups(days:list):
+        """ Concatenate {name: ChannelRollup} dicts of consecutive days, channel by channel. """
+        names = list(dict.fromkeys(name for day in days for name in day))
+        return { name: ChannelRollup(*(np.concatenate([ getattr(day[name], stat) for day in days if name in day ])
+                                       for stat in ChannelRollup.__slots__))
+                 for name in names }
+
+    @staticmethod
+    def to_channels(levels:dict):
+        """
+        Flatten {level: {name: ChannelRollup}} into {'level/name/stat': ChannelSeries}, the
+        form stored by BlueForsLogCache. The stats of a rollup share one times array.
+        """
+        return { f"{level}/{name}/{stat}": ChannelSeries(rollup.times, getattr(rollup, stat).astype(float))
+                 for level, rollups in levels.items() for name, rollup in rollups.items() for stat in ChannelRollup._stats }
+
+    @staticmethod
+    def from_channels(channels:dict):
+        """ Inverse of to_channels. """
+        levels = {}
+        for key, channel in channels.items():
+            level, rest = key.split('/', 1)
+            name, stat = rest.rsplit('/', 1)
+            levels.setdefault(level, {}).setdefault(name, {'times': channel.times})[stat] = channel.values
+
+        return { level: { name: ChannelRollup(parts['times'], parts['min'], parts['mean'], parts['max'], parts['count'].astype(np.int64))
+                          for name, parts in rollups.items() }
+                 for level, rollups in levels.items() }
+
+class BlueForsLogCache:
+    """ Cache parsed days on disk, one .npz file per (day, log type).
+
+    The channels of a day are stored as one datetime64 and one float64 array, with the
+    dtype of each channel, e.g. int8 for the maxigauge flags, so a
+    hit skips CSV and datetime parsing entirely. An entry is valid as long as the name, mtime and size of its
+    source log files are unchanged, which keeps today's growing files fresh. The
+    total size is bounded by size_limit; least recently used entries are evicted.
+    """
+
+    _version = 5 # bump when the parsed layout of a day changes
+
+    def __init__(self, cache_dir:str, size_limit:int=2*1024**3):
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # path -> (last use, size) of every entry, for LRU eviction
+        self._entries = {}
+        for root, _, files in os.walk(cache_dir):
+            for file in files:
+                if file.endswith('.npz'):
+                    path = os.path.join(root, file)
+                    stat = os.stat(path)
+                    self._entries[path] = (stat.st_mtime, stat.st_size)
+
+    def _path(self, log_folder:str, date:date, type:str):
+        folder_key = hashlib.sha1(os.path.abspath(log_folder).encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, folder_key, f"{type} {date.strftime('%y-%m-%d')}.npz")
+
+    def _signature(self, full_file_names:list, manifest=None):
+        """
+        Return the cache version and the [name, mtime, size] of each source file, None for missing ones.
+        Raise FileNotFoundError if none of them exists, like the loaders do. With a
+        BlueForsLogManifest, the sizes and mtimes are taken from it instead of stat'ing the files.
+        """
+        signature = [self._version]
+        for file_name in full_file_names:
+            if manifest is not None:
+                stat = manifest.stat(file_name)
+                signature.append([os.path.basename(file_name), stat[1], stat[0]] if stat is not None else None)
+                continue
+            try:
+                stat = os.stat(file_name)
+                signature.append([os.path.basename(file_name), stat.st_mtime_ns, stat.st_size])
+            except FileNotFoundError:
+                signature.append(None)
+
+        if all(entry is None for entry in signature[1:]):
+            raise FileNotFoundError(full_file_names[0])
+
+        return signature
+
+    def load(self, log_folder:str, date:date, type:str, full_file_names, load_oneday, offsets:dict=None, manifest=None):
+        """
+        Return the cached {name: ChannelSeries} of a day, or parse it with
+        load_oneday(date) and store the result when the entry is missing or stale.
+
+        On a hit, offsets (if given) is updated with the size of each source file,
+        i.e. the byte offset up to which the cached entry covers it. With a manifest,
+        the sizes and mtimes of the source files come from it, see _signature.
+        """
+        if isinstance(full_file_names, str):
+            full_file_names = [full_file_names]
+
+        path = self._path(log_folder, date, type)
+        signature = self._signature(full_file_names, manifest)
+
+        result = self._read(path, signature)
+        if result is None:
+            result = load_oneday(date)
+            self._write(path, signature, result)
+        elif offsets is not None:
+            for file_name, entry in zip(full_file_names, signature[1:]):
+                offsets[file_name] = entry[2] if entry is not None else 0
+
+        return result
+
+    def _read(self, path:str, signature:list):
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz['meta']))
+                if meta['signature'] != signature:
+                    return None
+                times, values = npz['times'], npz['values']
+            os.utime(path) # mark as recently used
+            stat = os.stat(path)
+        except (ValueError, KeyError, OSError):
+            return None
+
+        with self._lock:
+            self._entries[path] = (stat.st_mtime, stat.st_size)
+
+        times = np.split(times, np.cumsum(meta['times'])[:-1])
+        channels, start = {}, 0
+        for (name, times_index), dtype in zip(meta['channels'], meta['dtypes']):
+            length = len(times[times_index])
+            channels[name] = ChannelSeries(times[times_index], values[start:start + length].astype(dtype, copy=False))
+            start += length
+
+        return channels
+
+    def _write(self, path:str, signature:list, channels:dict):
+        # all arrays of a day go in two members, which reads much faster than a member per channel
+        times, times_index = [], {}
+        for channel in channels.values():
+            if id(channel.times) not in times_index:
+                times_index[id(channel.times)] = len(times)
+                times.append(channel.times)
+
+        meta = {'signature': signature,
+                'times': [ len(array) for array in times ],
+                'channels': [ [name, times_index[id(channel.times)]] for name, channel in channels.items() ],
+                'dtypes': [ channel.values.dtype.str for channel in channels.values() ]}
+        arrays = {'meta': np.array(json.dumps(meta)),
+                  'times': np.concatenate(times) if times else np.array([], dtype='datetime64[s]'),
+                  'values': np.concatenate([ channel.values for channel in channels.values() ]) if channels else np.array([])}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            stat = os.stat(path)
+            self._entries[path] = (stat.st_mtime, stat.st_size)
+            self._evict()
+
+    def _evict(self):
+        total_size = sum(size for _, size in self._entries.values())
+        for path in sorted(self._entries, key=lambda path: self._entries[path][0]):
+            if total_size <= self.size_limit:
+                break
+            total_size -= self._entries.pop(path)[1]
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class BlueForsLogManifest:
+    """ Index of the date folders and log files of a log folder.
+
+    One scan lists every yy-mm-dd folder with the name, size and mtime of its files, so
+    loaders know which files exist without probing them one by one, which is slow on a
+    network share when the range has gaps. update() only lists the folders that are new,
+    whose mtime changed, or that were scanned while their day was still being written.
+    With a path, the manifest is kept as JSON and reused by the next session.
+    """
+
+    _version = 1
+    _date_folder = re.compile(r"^\d{2}-\d{2}-\d{2}$")
+    _settle_time = timedelta(hours=1) # files may still be appended to this long after the end of their day
+
+    def __init__(self, log_folder:str, path:str=None):
+        self.log_folder = log_folder
+        self.path = path
+        self._folders = {} # 'yy-mm-dd' -> {'mtime': ..., 'files': {name: [size, mtime]}, 'final': bool, 'status_keys': [...]}
+        self._lock = threading.RLock()
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+                if saved['version'] == self._version and saved['log_folder'] == os.path.abspath(log_folder):
+                    self._folders = saved['folders']
+            except (ValueError, KeyError, OSError):
+                pass
+
+        self.update()
+
+    def __getstate__(self): # e.g. in the settings of the worker processes of BlueForsFleetLoader
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state:dict):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def update(self, since:date=None):
+        """
+        Rescan the new, changed and unfinished date folders and drop the removed ones.
+
+        A folder is final once it has been scanned after its day ended, plus _settle_time;
+        until then its files may grow, so it is rescanned. With since, the folders before
+        since that are already known are not even stat'ed, so e.g. a refresh costs one
+        listing of the log folder plus the folders of the live days, not one round-trip
+        per folder of the archive.
+        """
+        with self._lock: # loaders update from several threads; readers keep the dict they got
+            try:
+                entries = { entry.name: entry for entry in os.scandir(self.log_folder)
+                            if self._date_folder.match(entry.name) and entry.is_dir() }
+            except FileNotFoundError:
+                entries = {}
+
+            folders = dict(self._folders)
+            changed = False
+            for name in set(folders) - set(entries):
+                del folders[name]
+                changed = True
+
+            now = datetime.now()
+            for name, entry in entries.items():
+                folder = folders.get(name)
+                if folder is not None and since is not None and self._folder_date(name) < since:
+                    continue
+                mtime = entry.stat().st_mtime_ns
+                if folder is not None and folder['mtime'] == mtime and folder.get('final'):
+                    continue
+
+                files = { file.name: [file.stat().st_size, file.stat().st_mtime_ns]
+                          for file in os.scandir(entry.path) if file.is_file() }
+                final = now >= datetime.combine(self._folder_date(name) + timedelta(days=1), datetime.min.time()) + self._settle_time
+                if folder is None or folder['mtime'] != mtime or folder['files'] != files or folder.get('final') != final:
+                    folders[name] = {**(folder or {}), 'mtime': mtime, 'files': files, 'final': final}
+                    changed = True
+
+            self._folders = folders
+            if changed and self.path is not None:
+                self.save()
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': self._version, 'log_folder': os.path.abspath(self.log_folder),
+                           'folders': self._folders}, f)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _folder_date(name:str):
+        return date(2000 + int(name[:2]), int(name[3:5]), int(name[6:8]))
+
+    def dates(self):
+        """ Return the sorted dates that have a folder. """
+        return sorted(self._folder_date(name) for name in self._folders)
+
+    def files(self, date:date):
+        """ Return {file name: [size, mtime]} of the folder of a date, empty if it has none. """
+        folder = self._folders.get(date.strftime("%y-%m-%d"))
+        return folder['files'] if folder is not None else {}
+
+    def exists(self, file_name:str):
+        """ Return whether a log file, given by its full path, is in the manifest. """
+        return self.stat(file_name) is not None
+
+    def stat(self, file_name:str):
+        """ Return [size, mtime] of a log file, given by its full path, or None if it is not in the manifest. """
+        folder = self._folders.get(os.path.basename(os.path.dirname(file_name)))
+        return folder['files'].get(os.path.basename(file_name)) if folder is not None else None
+
+    def channels(self, start_date:date=None, end_date:date=None):
+        """
+        Return the sorted numbers of the CH* channels with T or R log files, e.g. [1, 2, 5, 6],
+        in the folders between start_date and end_date, or in all folders.
+        """
+        channels = set()
+        for name, folder in self._folders.items():
+            if (start_date is not None and self._folder_date(name) < start_date) or \
+               (end_date is not None and self._folder_date(name) > end_date):
+                continue
+            for file_name in folder['files']:
+                match = re.match(r"^CH(\d+) [TR] ", file_name)
+                if match:
+                    channels.add(int(match.group(1)))
+        return sorted(channels)
+
+    def status_keys(self, date:date=None):
+        """
+        Return the keys of the first line of the Status_ log of a date, or of the latest
+        date with one. The keys are read once per folder and kept in the manifest.
+        """
+        names = [date.strftime("%y-%m-%d")] if date is not None else sorted(self._folders, key=self._folder_date, reverse=True)
+        for name in names:
+            folder = self._folders.get(name)
+            if folder is None or f"Status_{name}.log" not in folder['files']:
+                continue
+
+            if 'status_keys' not in folder:
+                try:
+                    with open(os.path.join(self.log_folder, name, f"Status_{name}.log")) as f:
+                        keys = f.readline().rstrip('\r\n').split(',')[2::2]
+                except OSError:
+                    continue
+                with self._lock:
+                    folder['status_keys'] = keys
+                    if self.path is not None:
+                        self.save()
+            return folder['status_keys']
+
+        return None
+
+    def compressors(self, date:date=None):
+        """ Return the number of compressors in the Status_ log (0, 1 or 2), from its keys. """
+        return self.count_compressors(self.status_keys(date) or [])
+
+    @staticmethod
+    def count_compressors(keys:list):
+        """ Return the number of compressors (0, 1 or 2) logging the given status keys. """
+        if any(key in keys for key in ('cpalp_2', 'cpavgl_2')):
+            return 2
+        if any(key in keys for key in ('cpalp', 'cpavgl')):
+            return 1
+        return 0
+
+_expression_functions = {'where': 3, 'clip': 3, 'nan_to_num': 1, 'round': 2} # element-wise numpy functions allowed besides
+                                                                             # the ufuncs, with their number of positional arguments
+
+def _compile_expression(expression:str, types:list):
+    """
+    Compile the expression of a derived channel, e.g. "status.cpahp - status.cpalp" or
+    "np.log10(pressure.P2/pressure.P1)".
+
+    Channels are written type.name, or type['name'] for names that are not identifiers,
+    e.g. temperature['50K']. Only arithmetic, comparisons, numeric constants and calls of
+    the numpy ufuncs (np.log10, np.abs, np.maximum, ...) and of np.where, np.clip,
+    np.nan_to_num and np.round are accepted, so an expression cannot reach anything
+    else, and it is element-wise, which the incremental evaluation of derived() relies on.
+
+    Returns
+    -------
+    (code, list)
+        The code, to be evaluated with the arrays of the inputs bound to _0, _1, ..., and
+        the (type, name) of the inputs in that order.
+    """
+    inputs = []
+
+    class Inputs(ast.NodeTransformer):
+        def input(self, node, type:str, name:str):
+            if name.startswith('__'):
+                raise Exception(f"Not supported channel {type}.{name} in \"{expression}\"!")
+            if (type, name) not in inputs:
+                inputs.append((type, name))
+            return ast.copy_location(ast.Name(id=f"_{inputs.index((type, name))}", ctx=ast.Load()), node)
+
+        def visit_Attribute(self, node):
+            if isinstance(node.value, ast.Name) and node.value.id in types:
+                return self.input(node, node.value.id, node.attr)
+            return self.generic_visit(node)
+
+        def visit_Subscript(self, node):
+            if isinstance(node.value, ast.Name) and node.value.id in types and isinstance(node.slice, ast.Constant):
+                return self.input(node, node.value.id, str(node.slice.value))
+            return self.generic_visit(node)
+
+        def visit_Name(self, node):
+            if node.id != 'np':
+                raise Exception(f"Unknown name '{node.id}' in \"{expression}\"!")
+            return node
+
+    def check(node):
+        if isinstance(node, ast.Call):
+            func = node.func
+            if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == 'np'
+                    and (func.attr in _expression_functions or isinstance(getattr(np, func.attr, None), np.ufunc))):
+                raise Exception(f"Not supported function {ast.unparse(func)} in \"{expression}\"!")
+            if len(node.args) > _expression_functions.get(func.attr, getattr(getattr(np, func.attr), 'nin', 0)):
+                raise Exception(f"Too many arguments of np.{func.attr} in \"{expression}\"!")
+            for keyword in node.keywords: # out= or copy=False would write into the arrays of the loader
+                if keyword.arg not in ('a_min', 'a_max', 'decimals', 'nan', 'posinf', 'neginf'):
+                    raise Exception(f"Not supported argument {keyword.arg} in \"{expression}\"!")
+            for argument in node.args + [ keyword.value for keyword in node.keywords ]:
+                check(argument)
+        elif isinstance(node, ast.BinOp):
+            check(node.left)
+            check(node.right)
+        elif isinstance(node, ast.UnaryOp):
+            check(node.operand)
+        elif isinstance(node, ast.Compare):
+            for operand in [node.left] + node.comparators:
+                check(operand)
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)):
+                raise Exception(f"Not supported constant {node.value!r} in \"{expression}\"!")
+        elif not (isinstance(node, ast.Name) and node.id in inputs_ids):
+            raise Exception(f"Not supported {ast.unparse(node)} in \"{expression}\"!")
+
+    tree = Inputs().visit(ast.parse(expression, mode='eval'))
+    if not inputs:
+        raise Exception(f"\"{expression}\" uses no channel!")
+    inputs_ids = [ f"_{k}" for k in range(len(inputs)) ]
+    check(tree.body)
+    return compile(ast.fix_missing_locations(tree), expression, 'eval'), inputs
+
+def _evaluate_expression(code, arrays:list, length:int):
+    """ Evaluate a compiled expression on the arrays of its inputs; returns float64 values. """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.asarray(eval(code, {'__builtins__': {}, 'np': np}, { f"_{k}": array for k, array in enumerate(arrays) }),
+                            dtype=float)
+    return np.full(length, values) if values.ndim == 0 else values
+
+def _apply_transform(transform:str, times:np.ndarray, values:np.ndarray, previous:tuple=None, max_gap:np.timedelta64=None):
+    """
+    Apply the transform of a derived channel to the values of its expression.
+
+    None keeps the values. 'rate' is the change per second between consecutive samples,
+    NaN at the first one. 'integral' is the cumulative trapezoidal integral over seconds
+    from the first sample; intervals with a NaN end contribute nothing. Intervals longer
+    than max_gap, e.g. over missing days, are gaps in the data: their rate is NaN and
+    they add nothing to the integral.
+
+    previous is the (time, value, result) of the sample before times[0], to continue the
+    result of the earlier samples exactly as if all samples were transformed at once.
+    """
+    if transform is None:
+        return values
+
+    if previous is not None:
+        times = np.concatenate(([previous[0]], times))
+        values = np.concatenate(([previous[1]], values))
+    intervals = np.diff(times)
+    seconds = intervals.astype(np.int64).astype(float)
+    gaps = intervals > max_gap if max_gap is not None else np.zeros(len(intervals), dtype=bool)
+
+    if transform == 'rate':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.diff(values)/seconds
+        rates[gaps] = np.nan
+        return rates if previous is not None else np.concatenate(([np.nan], rates))
+
+    areas = 0.5*(values[1:] + values[:-1])*seconds
+    areas[np.isnan(areas) | gaps] = 0.0
+    integral = np.cumsum(np.concatenate(([0.0 if previous is None else previous[2]], areas)))
+    return integral[1:] if previous is not None else integral
+
+def _frame_property(type:str, index:int):
+    """ Property returning the datetimes (index 0) or values (index 1) dataframe of a log type. """
+    return property(lambda self: self._get_frames(type)[index])
 
 class BlueForsLogLoader:
     """ Load log data from log files """
+
+    _channel_names = ["50K", "4K", "still", "MCX"] # CH1, CH2, CH5, CH6
+    _channel_numbers = [1, 2, 5, 6]
+
+    log_types = ['temperature', 'resistance', 'pressure', 'flowmeter', 'status']
+
+    rollup_levels = {'1min': 60, '1h': 3600, '1d': 86400} # bin width in seconds
+
+    _gauge_flags = ['state', 'status'] # int8 flags of every maxigauge gauge, as 'P1 state', 'P1 status', ...
+
+    temperature_datetimes = _frame_property('temperature', 0)
+    temperatures = _frame_property('temperature', 1)
+    resistance_datetimes = _frame_property('resistance', 0)
+    resistances = _frame_property('resistance', 1)
+    pressure_datetime = _frame_property('pressure', 0)
+    pressures = _frame_property('pressure', 1)
+    flowmeter_datetime = _frame_property('flowmeter', 0)
+    flowmeter = _frame_property('flowmeter', 1)
+    status_datatime = _frame_property('status', 0)
+    status = _frame_property('status', 1)
         
-    def __init__(self, log_folder:str, start_date:date, end_date:date, what_type_to_load:str=None):
+    @_profiled
+    def __init__(self, log_folder:str, start_date:date, end_date:date, what_type_to_load:str=None, workers:int=1,
+                 cache_dir:str=None, cache_size_limit:int=2*1024**3, lazy:bool=False, status_keys:list=None,
+                 stats_callback=None, reader:str='pandas', manifest=None):
+        """
+        Parameters
+        ----------
+        what_type_to_load : str
+            'temperature', 'resistance', 'pressure', 'flowmeter', 'status', or None for all of them.
+            Other types are still loaded when their data is accessed.
+        workers : int
+            Number of threads parsing the days of all log types concurrently, with as many
+            threads reading the CH* files of those days. Useful when the log folder is
+            on a network share and most of the time is spent waiting for files. The
+            loaded data is the same as with the default serial loading.
+        cache_dir : str
+            Folder of a BlueForsLogCache of parsed days. Days whose log files are unchanged
+            are read from the cache instead of being parsed again.
+        cache_size_limit : int
+            Maximum size of the cache in bytes.
+        lazy : bool
+            If True, nothing is loaded here; every type is read on first access of its data.
+        status_keys : list
+            Status keys to load, e.g. ['cpalp', 'cpahp', 'cpatempwi']. All keys if None.
+        stats_callback : callable
+            Called as stats_callback(day, type, record) after every read recorded in self.stats.
+        reader : str
+            How the CH* and Flowmeter logs are parsed: 'pandas' with read_csv, or 'mmap', which
+            maps each file and tokenizes it in place with parse_channel_buffer. 'mmap' needs
+            less memory and time for large files; both give the same data.
+        manifest : BlueForsLogManifest, str or bool
+            Resolve the log files from a BlueForsLogManifest instead of opening every file of
+            the range: a manifest, the path of its JSON file, or True for one kept in memory.
+            The CH* channels are then detected from the files, e.g. a CH3 T file gives a 'CH3'
+            channel, instead of being CH1, CH2, CH5 and CH6.
+
+        Attributes
+        ----------
+        stats : dict
+            (day, type) -> {stage: seconds, 'bytes': ..., 'rows': ...} of every day read. The
+            stages are 'read' (file I/O), 'parse' (CSV tokenizing), 'datetime', 'cache' and
+            'total'. Items with day None time the 'concat' of the range and the 'frames'.
+            Every record is also logged at DEBUG level on the 'bluefors_log_view' logger.
+        """
         self.log_folder = log_folder
         self.start_date = start_date
         self.end_date = end_date
+        self.workers = workers
+        self.status_keys = status_keys
+        self.reader = reader
+        if manifest is True or isinstance(manifest, str):
+            manifest = BlueForsLogManifest(log_folder, None if manifest is True else manifest)
+        self.manifest = manifest
+        self.cache = BlueForsLogCache(cache_dir, cache_size_limit) if cache_dir is not None else None
+        self.stats = {}
+        self.stats_callback = stats_callback
+        self._current = threading.local() # record of the (day, type) being read by this thread
+
+        if manifest is not None and manifest.channels(start_date, end_date):
+            names = dict(zip(BlueForsLogLoader._channel_numbers, BlueForsLogLoader._channel_names))
+            self._channel_numbers = manifest.channels(start_date, end_date)
+            self._channel_names = [ names.get(number, f"CH{number}") for number in self._channel_numbers ]
 
         self._status_column_name = self._get_status_column_name()
-        
-        if what_type_to_load=="temperature":
-            self.temperature_datetimes, self.temperatures = self._load_temperature()
-        elif what_type_to_load=="resistance":
-            self.resistance_datetimes, self.resistances = self._load_resistance()
-        elif what_type_to_load=="pressure":
-            self.pressure_datetime, self.pressures = self._load_pressure()
-        elif what_type_to_load=="flowmeter":
-            self.flowmeter_datetime, self.flowmeter = self._load_flowmeter()
-        elif what_type_to_load=="status":
-            self.status_datatime, self.status = self._load_status()
-        elif what_type_to_load is None:
-            self.temperature_datetimes, self.temperatures = self._load_temperature()
-            self.resistance_datetimes, self.resistances = self._load_resistance()
-            self.pressure_datetime, self.pressures = self._load_pressure()
-            self.flowmeter_datetime, self.flowmeter = self._load_flowmeter()
-            self.status_datatime, self.status = self._load_status()
+
+        self._days = { type: {} for type in self.log_types } # type -> {date: {name: ChannelSeries} or None}, shared with windows
+        self._channels = {} # type -> {name: ChannelSeries} between start_date and end_date
+        self._frames = {}   # type -> (datetimes, values) dataframes built from self._channels
+        self._rollups = { type: {} for type in self.log_types } # type -> {date: {level: {name: ChannelRollup}}}, shared with windows
+        self._rollup_ranges = {} # (type, level) -> {name: ChannelRollup} between start_date and end_date
+        self._offsets = {}  # file name -> number of bytes parsed, for refresh()
+        self._generations = { type: 0 for type in self.log_types } # type -> number of refresh() adding samples, shared with windows
+        self.derived_channels = {} # name -> definition of a derived channel, see define()
+        self._derived = {} # name -> last evaluation of a derived channel, see derived()
+        self._define_defaults()
+
+        if reader not in ('pandas', 'mmap'):
+            raise Exception("Not supported reader!")
+
+        if what_type_to_load is None:
+            types = self.log_types
+        elif what_type_to_load in self.log_types:
+            types = [what_type_to_load]
         else:
             raise Exception("Not supported type!")
 
+        if not lazy:
+            self._load_types(types, self.start_date, self.end_date)
+
+    @contextlib.contextmanager
+    def _record(self, day:date, type:str):
+        """
+        Collect the stages and counters of one read of (day, type) and add them to self.stats.
+        """
+        record, outer = {}, getattr(self._current, 'record', None)
+        self._current.record = record
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['total'] = time.perf_counter() - t0
+            self._current.record = outer
+
+            stats = self.stats.setdefault((day, type), {})
+            for key, value in record.items():
+                stats[key] = stats.get(key, 0) + value
+
+            logger.debug("%s %s %s", day, type, record)
+            if self.stats_callback is not None:
+                self.stats_callback(day, type, record)
+
+    @contextlib.contextmanager
+    def _stage(self, name:str):
+        """ Add the time spent in the block to the current record, if any. """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._count(name, time.perf_counter() - t0)
+
+    def _count(self, name:str, value):
+        record = getattr(self._current, 'record', None)
+        if record is not None:
+            record[name] = record.get(name, 0) + value
+
     def _get_full_file_names(self, date:date, type:str):
         """Generate file names.
 
@@ -48,20 +1410,8 @@ class BlueForsLogLoader:
         date_str = date.strftime("%y-%m-%d")
         base_path = os.path.join(self.log_folder, date_str)    
 
-        if type == 'temperature':
-            file_names = ['CH1 T ' + date_str + '.log', 
-                    'CH2 T ' + date_str + '.log', 
-                    'CH5 T ' + date_str + '.log', 
-                    'CH6 T ' + date_str + '.log' ]
-
-            full_file_name = [ os.path.join(base_path, file_name) for file_name in file_names ]
-        elif type == 'resistance':
-            file_names = ['CH1 R ' + date_str + '.log', 
-                    'CH2 R ' + date_str + '.log', 
-                    'CH5 R ' + date_str + '.log', 
-                    'CH6 R ' + date_str + '.log' ]
-
-            full_file_name = [ os.path.join(base_path, file_name) for file_name in file_names ]
+        if type in ('temperature', 'resistance'):
+            full_file_name = list(self._channel_files(date, type).values())
         elif type == 'pressure':
             file_name = 'maxigauge ' + date_str + '.log'
             full_file_name = os.path.join(base_path, file_name)
@@ -76,145 +1426,205 @@ class BlueForsLogLoader:
         
         return full_file_name
     
-    def _load_temperature_oneday(self, date:date):
+    def _channel_files(self, date:date, type:str):
         """
-            Read temperature log files and return two pandas dataframe of datetime and temperatures.
+        Return {channel name: full file name} of the CH* files of a day, 'temperature' or 'resistance'.
+        With a manifest, only the channels with a file on that day, so that a channel added
+        on other days neither is looked for nor changes the cache signature of this day.
         """
-               
-        full_file_names = self._get_full_file_names(date, 'temperature')
-        
-        df_datetimes, df_temperatures = pd.DataFrame(), pd.DataFrame()
-        
-        for file_name in full_file_names:
-            # print(file_name)
-            try:
-                with open(file_name, 'r') as f: 
-                    df = pd.read_csv(f, names=['date', 'time', 'temperature'], header=0)
-
-                    try:
-                        df_datetime  = pd.to_datetime(df['date'] + df['time'], format=' %d-%m-%y%H:%M:%S')
-                    except ValueError:
-                        df_datetime  = pd.to_datetime(df['date'] + df['time'], format='%d-%m-%y%H:%M:%S')
+        date_str = date.strftime("%y-%m-%d")
+        letter = 'T' if type == 'temperature' else 'R'
+        files = { name: os.path.join(self.log_folder, date_str, f'CH{number} {letter} {date_str}.log')
+                  for name, number in zip(self._channel_names, self._channel_numbers) }
+        if self.manifest is not None:
+            present = { name: file_name for name, file_name in files.items() if self.manifest.exists(file_name) }
+            if present:
+                return present
+        return files
+
+    def _check_exists(self, file_name:str):
+        """ Raise FileNotFoundError for a file that is not in the manifest, without touching the disk. """
+        if self.manifest is not None and not self.manifest.exists(file_name):
+            raise FileNotFoundError(file_name)
+
+    def _read_log_file(self, file_name:str, tail:bool=False):
+        """
+            Return the complete lines of a log file as a binary buffer and remember the byte
+            offset up to which the file has been read. With tail=True, only the lines
+            appended since the previous read are returned.
+        """
+        offset = self._offsets.get(file_name, 0) if tail else 0
 
-                    df_datetimes = pd.concat([df_datetimes, df_datetime], axis=1)             
-                    df_temperatures = pd.concat([df_temperatures, df['temperature']], axis=1)
-            except FileNotFoundError:
-                print(f"FileNotFound: {file_name}")
+        try:
+            self._check_exists(file_name)
+            with self._stage('read'), open(file_name, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            self._offsets[file_name] = 0 # refresh() picks the file up once it is created
+            raise
 
-                df_datetimes = pd.concat([df_datetimes, pd.Series()], axis=1)             
-                df_temperatures = pd.concat([df_temperatures, pd.Series(name="temperature")], axis=1)
- 
+        end = data.rfind(b'\n') + 1 # a line still being written is left for the next read
+        self._offsets[file_name] = offset + end
+        self._count('bytes', end)
+        if end == 0:
+            raise pd.errors.EmptyDataError(f"No new lines in {file_name}")
 
-        return df_datetimes, df_temperatures
+        return io.BytesIO(data[:end])
 
-    def _load_resistance_oneday(self, date:date):
+    def _map_log_file(self, file_name:str, tail:bool=False, parse=parse_channel_buffer):
         """
-            Read resistance log files and return two pandas dataframe of datetime and resistances.
+            Like _read_log_file, but parse the complete lines of a log in place from a memory
+            map of the file with parse(buffer, start, end), by default the times and values of
+            a 'date,time,value' log. The map is closed right after parsing, so the file is not
+            held open.
         """
-             
-        full_file_names = self._get_full_file_names(date, 'resistance')
-        
-        df_datetimes, df_resistances = pd.DataFrame(), pd.DataFrame()
-        
-        for file_name in full_file_names:
-            # print(file_name)
-        
-            with open(file_name, 'r') as f: 
-                df = pd.read_csv(f, names=['date', 'time', 'resistance'], header=0)
-            with open(file_name, 'r') as f: 
-                df = pd.read_csv(f, names=['date', 'time', 'temperature'], header=0)
+        offset = self._offsets.get(file_name, 0) if tail else 0
 
-                try:
-                    df_datetime  = pd.to_datetime(df['date'] + df['time'], format=' %d-%m-%y%H:%M:%S')
-                except ValueError:
-                    df_datetime  = pd.to_datetime(df['date'] + df['time'], format='%d-%m-%y%H:%M:%S')
+        try:
+            self._check_exists(file_name)
+            f = open(file_name, 'rb')
+        except FileNotFoundError:
+            self._offsets[file_name] = 0
+            raise
 
-                df_datetimes = pd.concat([df_datetimes, df_datetime], axis=1)             
-                df_resistances = pd.concat([df_resistances, df['resistance']], axis=1)
-           
-        return df_datetimes, df_resistances
+        with f:
+            with self._stage('read'):
+                size = os.fstat(f.fileno()).st_size
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > offset else None
 
-    def _load_pressure_oneday(self, date:date):
+            if buffer is None:
+                end = offset
+            else:
+                with buffer:
+                    end = buffer.rfind(b'\n', offset) + 1 or offset
+                    if end > offset:
+                        with self._stage('parse'):
+                            result = parse(buffer, offset, end)
+
+        self._offsets[file_name] = end
+        self._count('bytes', end - offset)
+        if end == offset:
+            raise pd.errors.EmptyDataError(f"No new lines in {file_name}")
+
+        self._count('rows', len(result[0]))
+        return result
+
+    def _read_channel_file(self, file_name:str, tail:bool=False):
         """
-            Read pressure log file and return two pandas dataframe of datetime and pressure.
+            Return the times and values of a 'date,time,value' log, i.e. a CH* or Flowmeter file.
         """
-        # date_str = date.strftime("%y-%m-%d")
-        # base_path = os.path.join(self.log_folder, date_str)  
-        # file_name = 'maxigauge ' + date_str + '.log'
-        # full_file_name = os.path.join(base_path, file_name)
+        if self.reader == 'mmap':
+            return self._map_log_file(file_name, tail)
 
-        full_file_name = self._get_full_file_names(date, 'pressure')
+        f = self._read_log_file(file_name, tail)
+        with self._stage('parse'):
+            df = pd.read_csv(f, header=None)
+        with self._stage('datetime'):
+            times = parse_datetimes(df.iloc[:,0], df.iloc[:,1])
+        self._count('rows', len(df))
 
-        df_datetimes, df_pressures = pd.DataFrame(), pd.DataFrame()
+        return times, df.iloc[:,2].to_numpy(dtype=float)
 
-        with open(full_file_name, 'r') as f:
-            df = pd.read_csv(f, header=None)
+    def _load_channels_oneday(self, date:date, type:str, tail:bool=False, executor=None):
+        """
+            Read CH* log files of the given type ('temperature' or 'resistance') and
+            return a {name: ChannelSeries} dict, one item per channel file found.
+            With an executor, the files are read concurrently in it.
+        """
+
+        def read(file_name):
             try:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format='%d-%m-%y%H:%M:%S')
-            except ValueError:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format=' %d-%m-%y%H:%M:%S')
-            df_pressures = df.iloc[:, [5,11,17,23,29,35]]
-        
-        # print(df_datetimes.shape)
-        # print(df_pressures.shape)   
+                return ChannelSeries(*self._read_channel_file(file_name, tail))
+            except FileNotFoundError:
+                if not tail:
+                    print(f"FileNotFound: {file_name}")
+            except pd.errors.EmptyDataError:
+                pass
+            return None
 
-        return df_datetimes, df_pressures
+        def read_in_thread(file_name):
+            # the stages are counted in a record of the thread, added to the day's record below
+            record, outer = {}, getattr(self._current, 'record', None)
+            self._current.record = record
+            try:
+                return read(file_name), record
+            finally:
+                self._current.record = outer
+
+        files = self._channel_files(date, type)
+        if executor is None:
+            results = [ read(file_name) for file_name in files.values() ]
+        else:
+            results = []
+            for future in [ executor.submit(read_in_thread, file_name) for file_name in files.values() ]:
+                channel, record = future.result()
+                for key, value in record.items():
+                    self._count(key, value)
+                results.append(channel)
 
-    def _load_flowmeter_oneday(self, date: date):
+        return { name: channel for name, channel in zip(files, results) if channel is not None }
+
+    def _load_temperature_oneday(self, date:date, tail:bool=False):
         """
-            Read flowmeter log file and return two pandas dataframe of datetime and flowrate.
+            Read temperature log files and return the temperature channels.
         """
-        # date_str = date.strftime("%y-%m-%d")
-        # base_path = os.path.join(self.log_folder, date_str)  
-        # file_name = 'Flowmeter ' + date_str + '.log'
-        # full_file_name = os.path.join(base_path, file_name)
+        return self._load_channels_oneday(date, 'temperature', tail)
 
-        full_file_name = self._get_full_file_names(date, 'flowmeter')        
-        df_datetimes, df_flowmeter = pd.DataFrame(), pd.DataFrame()
-        
-        with open(full_file_name, 'r') as f:
-            df = pd.read_csv(f, header=None)
-            try:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format=' %d-%m-%y%H:%M:%S')
-            except ValueError:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format='%d-%m-%y%H:%M:%S')
-            df_flowmeter = df.iloc[:,2]
-        
-        # print(df_datetimes.shape)
-        # print(df_flowmeter.shape)   
+    def _load_resistance_oneday(self, date:date, tail:bool=False):
+        """
+            Read resistance log files and return the resistance channels.
+        """
+        return self._load_channels_oneday(date, 'resistance', tail)
 
-        return df_datetimes, df_flowmeter
+    def _load_pressure_oneday(self, date:date, tail:bool=False):
+        """
+            Read pressure log file and return a Pn channel per maxigauge gauge CHn, NaN
+            while the gauge is off, and its int8 'Pn state' and 'Pn status' flags.
+        """
+        full_file_name = self._get_full_file_names(date, 'pressure')
 
-    def _load_status_oneday(self, date:date):
+        if self.reader == 'mmap':
+            times, gauges = self._map_log_file(full_file_name, tail, parse=parse_maxigauge_buffer)
+        else:
+            f = self._read_log_file(full_file_name, tail)
+            with self._stage('parse'):
+                times, gauges = parse_maxigauge_buffer(f.getbuffer())
+            self._count('rows', len(times))
+
+        channels = { f"P{number}": ChannelSeries(times, np.where(gauge['state'] == 1, gauge['pressure'], np.nan))
+                     for number, gauge in gauges.items() }
+        for number, gauge in gauges.items():
+            for flag in self._gauge_flags:
+                channels[f"P{number} {flag}"] = ChannelSeries(times, gauge[flag])
+
+        return channels
+
+    def _load_flowmeter_oneday(self, date: date, tail:bool=False):
         """
-        Read status log file and return two pandas dataframe of datetime and status.
+            Read flowmeter log file and return the flowmeter channel.
         """
-        # date_str = date.strftime("%y-%m-%d")
-        # base_path = os.path.join(self.log_folder, date_str)  
-        # file_name = 'Status_' + date_str + '.log'
-        # full_file_name = os.path.join(base_path, file_name)
+        full_file_name = self._get_full_file_names(date, 'flowmeter')
+
+        return { "flowmeter": ChannelSeries(*self._read_channel_file(full_file_name, tail)) }
 
+    def _load_status_oneday(self, date:date, tail:bool=False):
+        """
+        Read status log file and return one channel per status key.
+        """
         full_file_name = self._get_full_file_names(date, 'status')
-        
-        df_datetimes, df_status = pd.DataFrame(), pd.DataFrame()
-        
-        with open(full_file_name, 'r') as f:
-            if len(self._status_column_name)==23: # for singel compressor
-                df = pd.read_csv(f, header=None, delimiter=',', usecols=range(48)) # for some reason, sometimes a certain row of status file has extra columns, making an error.
-            else:
-                df = pd.read_csv(f, header=None, delimiter=',') # for XLD, i.e., two compressors
-            df = pd.read_csv(f, header=None)
-            try:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format='%d-%m-%y%H:%M:%S')
-            except ValueError:
-                df_datetimes  = pd.to_datetime(df.iloc[:,0] + df.iloc[:,1], format=' %d-%m-%y%H:%M:%S')
-            
-            _, cols = df.shape
-            df_status = df.iloc[:, list(np.arange(3, cols,2))]  
 
-        return df_datetimes, df_status
+        # parsed block by block straight from a map of the file, whatever the reader
+        times, columns = self._map_log_file(full_file_name, tail, parse=functools.partial(parse_status_buffer, keys=self.status_keys))
+        return { key: ChannelSeries(times, values) for key, values in columns.items() }
 
     def _get_status_column_name(self):
+        if self.manifest is not None:
+            keys = self.manifest.status_keys(self.start_date)
+            if keys is None:
+                print("No status file found.")
+            return keys
+
         full_file_name = self._get_full_file_names(self.start_date, 'status')
         try:
             with open(full_file_name) as f:
@@ -225,130 +1635,537 @@ class BlueForsLogLoader:
             print("No status file found.")
             return None
 
-    def _load_temperature(self):
+    def _cache_type(self, type:str):
+        """ Return the name of a log type in the cache. """
+        if type == 'status' and self.status_keys is not None: # a projection is cached apart from the full status
+            return type + ' ' + hashlib.sha1(','.join(self.status_keys).encode()).hexdigest()[:8]
+        return type
+
+    def _load_days(self, type:str, start_date:date, end_date:date):
+        """ Read the days of one log type between start_date and end_date that are not in memory yet. """
+        self._load_types([type], start_date, end_date)
+
+    def _load_types(self, types:list, start_date:date, end_date:date):
         """
-        Return time and temperature dataframes between start_date and end_date
+        Read the days of the given log types between start_date and end_date that are not in memory yet.
+
+        The channels of each day are only stored here; they are concatenated once
+        per channel by ChannelSeries.concat_channels, so loading time and memory
+        grow linearly with the number of days.
+        With workers > 1 the (type, day) jobs of all types go to one thread pool, and the
+        CH* files of a day are read concurrently in a second one; the jobs wait for the
+        files, so sharing one bounded pool could leave every thread waiting.
         """
-        df_datetimes_all, df_temperatures_all = pd.DataFrame(), pd.DataFrame()
-        
-        temp_date = self.start_date
+        num_days = (end_date - start_date).days + 1
+        dates = [ start_date + timedelta(days=i) for i in range(num_days) ]
+        jobs = [ (type, day) for type in types for day in dates if day not in self._days[type] ]
 
-        while temp_date <= self.end_date:
-            
-            # try:
-            df_datetimes, df_temperatures = self._load_temperature_oneday(temp_date)
-            
-            if not df_datetimes.empty:
-                try:                    
-                    df_datetimes_all = pd.concat([df_datetimes_all, df_datetimes], axis=0) #, ignore_index=True)
-                    df_temperatures_all = pd.concat([df_temperatures_all, df_temperatures]) #, axis=0, ignore_index=True)
-                except pd.errors.InvalidIndexError:
-                    #
-                    duplicated_indexes_pred = df_datetimes_all.index[df_datetimes_all.index.duplicated()]
-                    duplicated_indexes_else = df_datetimes.index[df_datetimes.index.duplicated()]
-                    print(duplicated_indexes_pred)
-                    print(duplicated_indexes_else)
-                    print(temp_date)
+        today = date.today()
 
-            temp_date += timedelta(days=1)
-        
-        df_datetimes_all.columns = ["50K", "4K", "still", "MCX"]
-        df_temperatures_all.columns = ["50K", "4K", "still", "MCX"]
+        if self.manifest is not None and jobs and dates[-1] >= max(self.manifest.dates(), default=dates[-1]):
+            self.manifest.update(since=dates[0]) # the latest folder may have new files
+
+        def try_load_oneday(type, day, file_executor=None):
+            load_oneday = getattr(self, f"_load_{type}_oneday")
+            if file_executor is not None and type in ('temperature', 'resistance'):
+                load_oneday = functools.partial(self._load_channels_oneday, type=type, executor=file_executor)
+            cache_type = self._cache_type(type)
+
+            with self._record(day, type):
+                try:
+                    if self.manifest is not None:
+                        full_file_names = self._get_full_file_names(day, type)
+                        if not any(map(self.manifest.exists, [full_file_names] if isinstance(full_file_names, str) else full_file_names)):
+                            raise FileNotFoundError(full_file_names)
+
+                    # only past days are immutable; today's files are always parsed
+                    if self.cache is not None and day < today:
+                        full_file_names = self._get_full_file_names(day, type)
+                        with self._stage('cache'):
+                            return self.cache.load(self.log_folder, day, cache_type, full_file_names, load_oneday, self._offsets,
+                                                   self.manifest)
+                    return load_oneday(day)
+                except FileNotFoundError:
+                    print(f"FileNotFound: {day}, {type}")
+                except pd.errors.EmptyDataError:
+                    pass
+                return None
+
+        if self.workers > 1 and jobs:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor, ThreadPoolExecutor(max_workers=self.workers) as file_executor:
+                results = list(executor.map(lambda job: try_load_oneday(*job, file_executor), jobs))
+        else:
+            results = [ try_load_oneday(type, day) for type, day in jobs ]
 
-        return df_datetimes_all, df_temperatures_all
+        for (type, day), result in zip(jobs, results):
+            self._days[type][day] = result if result and any(len(channel) for channel in result.values()) else None
 
-    def _load_resistance(self):
+    @classmethod
+    def is_gauge_flag(cls, name:str):
+        """ Return True if name is a maxigauge flag channel of the 'pressure' type, e.g. 'P1 state'. """
+        return name.rpartition(' ')[2] in cls._gauge_flags
+
+    def _column_names(self, type:str):
         """
-        Return time and resistance dataframes between start_date and end_date
+        Return the column names of the datetimes and values dataframes of a log type.
+        The datetimes are a single Series (None) for types whose channels share one time axis.
         """
-        df_datetimes_all, df_resistances_all = pd.DataFrame(), pd.DataFrame()
-        temp_date = self.start_date
+        if type in ('temperature', 'resistance'):
+            return self._channel_names, self._channel_names
+        elif type == 'pressure':
+            return None, ["P1","P2","P3","P4","P5","P6"]
+        elif type == 'flowmeter':
+            return None, ["flowmeter"]
+        else:
+            return None, self.status_keys or self._status_column_name
 
-        while temp_date <= self.end_date:
-            try:
-                df_datetimes, df_resistances = self._load_resistance_oneday(temp_date)
-            except FileNotFoundError:
-                df_datetimes, df_resistances = pd.DataFrame(), pd.DataFrame()
-                print(f"FileNotFound: {temp_date}, resistance")
+    def channels(self, type:str):
+        """
+        Return the channels of a log type between start_date and end_date, reading
+        the days that are not in memory yet.
 
-            df_datetimes_all = pd.concat([df_datetimes_all, df_datetimes], axis=0)
-            df_resistances_all = pd.concat([df_resistances_all, df_resistances], axis=0)
-            
-            temp_date += timedelta(days=1)
+        Returns
+        -------
+        dict
+            {name: ChannelSeries}, e.g. {'50K': ..., 'MCX': ...} for 'temperature'.
+        """
+        if type not in self._channels:
+            self._load_days(type, self.start_date, self.end_date)
 
-        df_datetimes_all.columns = ["50K", "4K","still","MCX"]
-        df_resistances_all.columns = ["50K", "4K","still","MCX"]
+            days = self._days[type]
+            num_days = (self.end_date - self.start_date).days + 1
+            with self._record(None, type), self._stage('concat'):
+                self._channels[type] = ChannelSeries.concat_channels([
+                    days[day] for day in (self.start_date + timedelta(days=i) for i in range(num_days))
+                    if days[day] is not None ])
 
-        return df_datetimes_all, df_resistances_all
+        return self._channels[type]
 
-    def _load_pressure(self):
+    def _day_rollups(self, type:str, day:date):
         """
-        Return time and pressure dataframes between start_date and end_date
+        Return the {level: {name: ChannelRollup}} of a day. They are computed from the parsed day
+        and, for past days, kept in the cache, so that later sessions read them without parsing.
         """
-        df_datetimes_all, df_pressures_all = pd.DataFrame(), pd.DataFrame()
-        temp_date = self.start_date
+        rollups = self._rollups[type]
+        if day not in rollups:
+            def roll_up(day):
+                self._load_days(type, day, day)
+                channels = self._days[type][day] or {}
+                levels, step = {}, None
+                for level, step in self.rollup_levels.items():
+                    source = levels[next(reversed(levels))] if levels else None
+                    levels[level] = { name: (ChannelRollup.from_channel(channel, step) if source is None else source[name].coarsen(step))
+                                      for name, channel in channels.items() }
+                return ChannelRollup.to_channels(levels)
 
-        while temp_date <= self.end_date:
             try:
-                df_datetimes, df_pressures = self._load_pressure_oneday(temp_date)
+                if self.cache is not None and day < date.today():
+                    full_file_names = self._get_full_file_names(day, type)
+                    flat = self.cache.load(self.log_folder, day, self._cache_type(type) + ' rollup', full_file_names, roll_up,
+                                           manifest=self.manifest)
+                else:
+                    flat = roll_up(day)
+                rollups[day] = ChannelRollup.from_channels(flat)
             except FileNotFoundError:
-                df_datetimes, df_pressures = pd.DataFrame(), pd.DataFrame()
-                print(f"FileNotFound: {temp_date}, pressure")
+                rollups[day] = {}
 
-            df_datetimes_all = pd.concat([df_datetimes_all, df_datetimes], axis=0)
-            df_pressures_all = pd.concat([df_pressures_all, df_pressures], axis=0)
-            
-            temp_date += timedelta(days=1)
-        
-        df_pressures_all.columns = ["P1","P2","P3","P4","P5","P6"]
+        return rollups[day]
 
-        return df_datetimes_all, df_pressures_all
+    def rollups(self, type:str, resolution:str='1h', start=None, end=None):
+        """
+        Return min/mean/max/count rollups of the channels of a log type.
+
+        The rollups come from the coarsest of the 1 min, 1 h and 1 d levels whose bins are not
+        wider than resolution, e.g. '1h' bins for resolution='6h', so a year of data is
+        summarized in thousands of bins instead of millions of samples. Days whose rollups are
+        in the cache are not parsed at all.
 
-    def _load_flowmeter(self):
+        Parameters
+        ----------
+        resolution : str
+            Largest acceptable bin width, e.g. '10min', '1h', '1d'.
+        start, end : datetime
+            Optional bounds of the bins, start <= time < end.
+
+        Returns
+        -------
+        dict
+            {name: ChannelRollup}
         """
-        Return time and flowmeter dataframes between start_date and end_date
+        width = pd.Timedelta(resolution).total_seconds()
+        level = max((level for level, step in self.rollup_levels.items() if step <= width),
+                    key=self.rollup_levels.get, default=next(iter(self.rollup_levels)))
+
+        if (type, level) not in self._rollup_ranges:
+            num_days = (self.end_date - self.start_date).days + 1
+            days = [ self._day_rollups(type, self.start_date + timedelta(days=i)) for i in range(num_days) ]
+            self._rollup_ranges[(type, level)] = ChannelRollup.concat_rollups([ day[level] for day in days if level in day ])
+
+        rollups = self._rollup_ranges[(type, level)]
+        if start is None and end is None:
+            return rollups
+        return { name: rollup.between(start, end) for name, rollup in rollups.items() }
+
+    def series(self, type:str, name:str, start=None, end=None):
+        """
+        Return one channel as a pandas Series with a DatetimeIndex, optionally
+        restricted to start <= time < end.
         """
-        df_datetimes_all, df_flowmeters_all = pd.DataFrame(), pd.DataFrame()
-        temp_date = self.start_date
+        return self.channels(type)[name].between(start, end).to_series(name)
 
-        while temp_date <= self.end_date:
-            try:
-                df_datetimes, df_flowmeters = self._load_flowmeter_oneday(temp_date)
-            except FileNotFoundError:
-                df_datetimes, df_flowmeters = pd.DataFrame(), pd.DataFrame()
-                print(f"FileNotFound: {temp_date}, flowmeter")
-        
-            df_datetimes_all = pd.concat([df_datetimes_all, df_datetimes], axis=0)
-            df_flowmeters_all = pd.concat([df_flowmeters_all, df_flowmeters], axis=0)
-            
-            temp_date += timedelta(days=1)
-        
-        df_flowmeters_all.columns = ["flowmeter"]
+    def channels_since(self, type:str, time):
+        """
+        Return the samples of a log type after time, up to end_date.
 
-        return df_datetimes_all, df_flowmeters_all
+        Only the days from the day of time on are concatenated, so after refresh() the cost
+        depends on the new samples rather than on the length of the range, e.g. to extend
+        a live plot.
 
-    def _load_status(self):
+        Returns
+        -------
+        dict
+            {name: ChannelSeries} with time < sample times.
         """
-            Return time and status dataframes between start_date and end_date.
+        time = np.datetime64(time, 's')
+        first = max(time.astype('datetime64[D]').astype(date), self.start_date)
+        if first > self.end_date:
+            return {}
+
+        self._load_days(type, first, self.end_date)
+        days = self._days[type]
+        num_days = (self.end_date - first).days + 1
+        channels = ChannelSeries.concat_channels([
+            days[day] for day in (first + timedelta(days=i) for i in range(num_days)) if days[day] is not None ])
+        return { name: channel.between(time + np.timedelta64(1, 's')) for name, channel in channels.items() }
+
+    def aligned(self, freq:str='1min', how:str='mean', types:list=None, tolerance:str=None):
         """
-        df_datetimes_all, df_status_all = pd.DataFrame(), pd.DataFrame()
-        temp_date = self.start_date
+        Return the channels of several log types on one common time grid.
 
-        while temp_date <= self.end_date:
-            try:
-                df_datetimes, df_status = self._load_status_oneday(temp_date)
-            except FileNotFoundError:
-                df_datetimes, df_status = pd.DataFrame(), pd.DataFrame()
-                print(f"FileNotFound: {temp_date}, status")
+        Every channel is resampled with ChannelSeries.resample, i.e. with sorted-array
+        binning and binary search instead of pairwise merges, onto the grid from
+        start_date 00:00 up to the end of end_date.
 
-            df_datetimes_all = pd.concat([df_datetimes_all, df_datetimes], axis=0)
-            df_status_all = pd.concat([df_status_all, df_status], axis=0)
-            
-            temp_date += timedelta(days=1)
+        Parameters
+        ----------
+        freq : str
+            Grid spacing understood by pandas, e.g. '10s', '1min', '1h'.
+        how : str
+            'mean', 'last' or 'asof', see ChannelSeries.resample.
+        types : list
+            Log types to include. By default, the types that have been loaded.
+        tolerance : str
+            For 'asof', samples older than this, e.g. '5min', are not used.
+
+        Returns
+        -------
+        pandas.DataFrame
+            float64 columns named 'type.channel', e.g. 'temperature.MCX' or 'status.cpahp',
+            indexed by the grid times.
+        """
+        if types is None:
+            types = [ type for type in self.log_types if self._days[type] ] or self.log_types
+
+        step = np.timedelta64(pd.Timedelta(freq).to_timedelta64(), 's')
+        start = np.datetime64(self.start_date, 's')
+        end = np.datetime64(self.end_date + timedelta(days=1), 's')
+        grid = np.arange(start, end, step)
+
+        if tolerance is not None:
+            tolerance = np.timedelta64(pd.Timedelta(tolerance).to_timedelta64(), 's')
+
+        columns = {}
+        for type in types:
+            for name, channel in self.channels(type).items():
+                columns[f"{type}.{name}"] = channel.resample(grid, step, how, tolerance)
+
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(grid, name='datetime'))
+
+    def compressors(self):
+        """ Return the number of compressors in the status log (0, 1 or 2), see BlueForsLogManifest.compressors. """
+        if self.manifest is not None and self.status_keys is None:
+            return self.manifest.compressors(self.start_date)
+        return BlueForsLogManifest.count_compressors(self.status_keys or self._status_column_name or [])
+
+    def _define_defaults(self):
+        """ Define the compressor delta P, the cumulative helium flow and the temperature rates. """
+        keys = self.status_keys or self._status_column_name or []
+        for suffix in ["", "_2"][:self.compressors()]:
+            high = "cpahp" + suffix if "cpahp" + suffix in keys else "cpavgh" + suffix
+            low = "cpalp" + suffix if "cpalp" + suffix in keys else "cpavgl" + suffix
+            if high in keys and low in keys:
+                self.define("delta_p" + suffix, f"status.{high} - status.{low}")
+
+        self.define("helium_flow", "flowmeter.flowmeter", transform='integral') # mmol, from the flow in mmol/s
+        for name in self._channel_names:
+            self.define(f"{name}_rate", f"temperature['{name}']", transform='rate') # K/s
+
+    def define(self, name:str, expression:str, freq:str=None, how:str='mean', tolerance:str=None, transform:str=None,
+               max_gap:str='1h'):
+        """
+        Register a derived channel, computed from the channels of the loader by derived().
+
+        Every loader has the derived channels delta_p (and delta_p_2) of the compressors,
+        helium_flow, the cumulative flowmeter flow in mmol, and the temperature rates
+        50K_rate, ..., MCX_rate in K/s. Defining a name again replaces its definition.
+
+            loader.define('P2/P1', 'pressure.P2/pressure.P1')
+            loader.define('MCX heating', "np.maximum(temperature.MCX - temperature.still, 0)", freq='1min')
+
+        Parameters
+        ----------
+        expression : str
+            Element-wise numpy expression of channels written type.name or type['name'], e.g.
+            "np.log10(pressure.P1)", see _compile_expression for what it may contain.
+        freq : str
+            If None, the expression is evaluated on the samples of its channels, which must be
+            of one log type and share their times, e.g. the status keys or the gauges. Otherwise
+            it is evaluated on the columns of aligned(freq, how, tolerance=tolerance).
+        how, tolerance
+            Resampling of the channels onto the grid of freq, see aligned().
+        transform : str
+            None, 'rate' for the derivative per second of the expression, or 'integral' for
+            its cumulative integral over seconds.
+        max_gap : str
+            Samples further apart than this, e.g. around missing days, are not differentiated
+            or integrated across: the rate is NaN there and the integral stays constant. On
+            a grid, bins without samples already are NaN and add nothing, so this only
+            applies when freq is None. None to never stop.
+        """
+        code, inputs = _compile_expression(expression, self.log_types)
+        if transform not in (None, 'rate', 'integral'):
+            raise Exception(f"Not supported transform {transform}!")
+        if freq is None and len({ type for type, _ in inputs }) > 1:
+            raise Exception(f"\"{expression}\" uses several log types, give freq to evaluate it on a common grid!")
+
+        self.derived_channels[name] = {'expression': expression, 'code': code, 'inputs': inputs, 'freq': freq,
+                                       'how': how, 'tolerance': tolerance, 'transform': transform,
+                                       'max_gap': None if max_gap is None else np.timedelta64(pd.Timedelta(max_gap).to_timedelta64(), 's')}
+        self._derived.pop(name, None)
+
+    def derived(self, name:str):
+        """
+        Return a derived channel registered with define().
+
+        The result is kept until refresh() adds samples of one of its log types. It is then
+        extended rather than computed again: the expression is evaluated only on the new
+        samples, or on the grid bins from the last sample of each input on, and rates and
+        integrals continue from the last value, so a dashboard polling derived channels
+        after every refresh pays for the new rows only.
+
+        Returns
+        -------
+        ChannelSeries
+            Times of the samples of the inputs, or start times of the grid bins with freq.
+        """
+        definition = self.derived_channels.get(name)
+        if definition is None:
+            raise Exception(f"Unknown derived channel {name}!")
+
+        types = sorted({ type for type, _ in definition['inputs'] })
+        version = (self.end_date, tuple(self._generations[type] for type in types))
+        state = self._derived.get(name)
+        if state is not None and state['version'] == version:
+            return state['channel']
+
+        t0 = time.perf_counter()
+        if definition['freq'] is None:
+            state = self._derive_samples(definition, state)
+        else:
+            state = self._derive_grid(definition, state)
+        state['version'] = version
+        self._derived[name] = state
+        logger.debug("derived %s %.3f s", name, time.perf_counter() - t0)
+
+        return state['channel']
+
+    def _derive_samples(self, definition:dict, state:dict):
+        """ Evaluate a derived channel on the samples of its inputs, after those of state if given. """
+        type = definition['inputs'][0][0]
+        if state is not None and len(state['channel']):
+            channels, previous = self.channels_since(type, state['channel'].times[-1]), state['previous']
+        else:
+            channels, previous, state = self.channels(type), None, None
+
+        inputs = [ channels.get(name) for _, name in definition['inputs'] ]
+        if any(channel is None or len(channel) == 0 for channel in inputs):
+            if state is not None: # no new samples
+                return state
+            missing = [ name for (_, name), channel in zip(definition['inputs'], inputs) if channel is None ]
+            if missing:
+                raise Exception(f"No {type} channel {', '.join(missing)}!")
+
+        times = inputs[0].times
+        for (_, name), channel in zip(definition['inputs'][1:], inputs[1:]):
+            if channel.times is not times and not np.array_equal(channel.times, times):
+                raise Exception(f"{name} does not share the times of {definition['inputs'][0][1]}, give freq to align them!")
+
+        values = _evaluate_expression(definition['code'], [ channel.values for channel in inputs ], len(times))
+        result = _apply_transform(definition['transform'], times, values, previous, definition['max_gap'])
+        if state is not None:
+            times = np.concatenate((state['channel'].times, times))
+            result = np.concatenate((state['channel'].values, result))
+
+        channel = ChannelSeries(times, result)
+        previous = (times[-1], values[-1], result[-1]) if len(times) else None
+        return {'channel': channel, 'previous': previous}
+
+    def _derive_grid(self, definition:dict, state:dict):
+        """
+        Evaluate a derived channel on the grid of aligned(). With state, only the bins from the
+        last sample of each input on are resampled again, from the samples read since.
+        """
+        how = definition['how']
+        step = np.timedelta64(pd.Timedelta(definition['freq']).to_timedelta64(), 's')
+        tolerance = definition['tolerance']
+        if tolerance is not None:
+            tolerance = np.timedelta64(pd.Timedelta(tolerance).to_timedelta64(), 's')
+        grid = np.arange(np.datetime64(self.start_date, 's'), np.datetime64(self.end_date + timedelta(days=1), 's'), step)
+
+        if state is None or len(state['columns'][0]) > len(grid):
+            columns, lasts = [], []
+            for type, name in definition['inputs']:
+                channel = self.channels(type).get(name)
+                if channel is None:
+                    raise Exception(f"No {type} channel {name}!")
+                columns.append(channel.resample(grid, step, how, tolerance))
+                lasts.append(channel.times[-1] if len(channel) else None)
+            values = _evaluate_expression(definition['code'], columns, len(grid))
+            result = _apply_transform(definition['transform'], grid, values)
+            return {'channel': ChannelSeries(grid, result), 'columns': columns, 'lasts': lasts, 'values': values}
+
+        # the grid only grows at its end, with the same start and step
+        n = len(state['columns'][0])
+        columns = [ np.concatenate((column, np.full(len(grid) - n, np.nan))) for column in state['columns'] ]
+        lasts, first, since = list(state['lasts']), n, {}
+        for k, (type, name) in enumerate(definition['inputs']):
+            last = lasts[k]
+            if last is None:
+                i, after = 0, grid[0] - np.timedelta64(1, 's')
+            elif how == 'asof': # bins before the last sample keep their value
+                i, after = np.searchsorted(grid, last, side='left'), last - np.timedelta64(1, 's')
+            else: # the bin of the last sample gets new samples
+                i = max(np.searchsorted(grid, last, side='right') - 1, 0)
+                after = grid[i] - np.timedelta64(1, 's')
+
+            if (type, after) not in since:
+                since[(type, after)] = self.channels_since(type, after)
+            channel = since[(type, after)].get(name)
+            if channel is not None and len(channel):
+                columns[k][i:] = channel.resample(grid[i:], step, how, tolerance)
+                lasts[k] = channel.times[-1]
+                first = min(first, i)
+
+        values = np.concatenate((state['values'][:first],
+                                 _evaluate_expression(definition['code'], [ column[first:] for column in columns ], len(grid) - first)))
+        old = state['channel'].values
+        previous = (grid[first - 1], values[first - 1], old[first - 1]) if first > 0 else None
+        result = np.concatenate((old[:first], _apply_transform(definition['transform'], grid[first:], values[first:], previous)))
+        return {'channel': ChannelSeries(grid, result), 'columns': columns, 'lasts': lasts, 'values': values}
+
+    def _get_frames(self, type:str):
+        """
+        Return the datetimes and values dataframes of a log type, with one column per channel.
+        """
+        if type not in self._frames:
+            channels = self.channels(type)
+            datetimes_columns, values_columns = self._column_names(type)
+            if type == 'pressure': # the frames hold the pressures only, without the gauge flags
+                channels = { name: channel for name, channel in channels.items() if not self.is_gauge_flag(name) }
+
+            with self._record(None, type), self._stage('frames'):
+                if not channels:
+                    frames = (pd.DataFrame(columns=datetimes_columns), pd.DataFrame(columns=values_columns))
+                elif datetimes_columns is None:
+                    frames = (pd.Series(next(iter(channels.values())).times),
+                              pd.DataFrame({ name: channel.values for name, channel in channels.items() }))
+                else:
+                    frames = (pd.concat([ pd.Series(channel.times) for channel in channels.values() ], axis=1, keys=list(channels)),
+                              pd.concat([ pd.Series(channel.values) for channel in channels.values() ], axis=1, keys=list(channels)))
+
+            self._frames[type] = frames
+
+        return self._frames[type]
+
+    def window(self, start_date:date, end_date:date):
+        """
+        Return a lazy loader of the days between start_date and end_date.
+
+        The window shares the parsed days with this loader: days already in memory
+        are not read again, and the days read through the window stay available here.
+        """
+        loader = copy.copy(self)
+        loader.start_date = start_date
+        loader.end_date = end_date
+        loader._channels = {}
+        loader._frames = {}
+        loader._rollup_ranges = {}
+        loader.derived_channels = dict(self.derived_channels)
+        loader._derived = {}
+
+        return loader
+
+    def refresh(self, today:date=None, follow:bool=None):
+        """
+        Read the lines appended to the log files since they were last read.
+
+        Only the bytes after the remembered offset of each file are parsed, so the cost
+        of a refresh is proportional to the new lines. When the range is followed, date
+        folders created after end_date, e.g. at midnight, are read as well and end_date
+        moves to today; otherwise only the days of the range are read.
+        Types that have not been loaded yet are left for their first access.
+
+        Parameters
+        ----------
+        today : date
+            Current day, date.today() by default.
+        follow : bool
+            Whether to extend the range up to today. By default, the range is only followed
+            if it ends on today or yesterday, i.e. if it shows live data, so refreshing a
+            past range does not extend it up to today.
+        """
+        today = today or date.today()
+        temp_date = min(self.end_date, today)
+        if follow is None:
+            follow = self.end_date >= today - timedelta(days=1)
+        last_date = today if follow else temp_date
+
+        if self.manifest is not None:
+            self.manifest.update(since=temp_date) # only the live folders and new ones
 
-        df_status_all.columns = self._status_column_name
+        while temp_date <= last_date:
+            for type, days in self._days.items():
+                if not days:
+                    continue
 
-        return df_datetimes_all, df_status_all
+                with self._record(temp_date, type):
+                    try:
+                        channels = getattr(self, f"_load_{type}_oneday")(temp_date, tail=True)
+                    except (FileNotFoundError, pd.errors.EmptyDataError):
+                        channels = {}
+
+                if not any(len(channel) for channel in channels.values()):
+                    days.setdefault(temp_date, None)
+                    continue
+
+                if days.get(temp_date) is None:
+                    days[temp_date] = channels
+                else:
+                    days[temp_date] = ChannelSeries.concat_channels([days[temp_date], channels])
+                self._channels.pop(type, None)
+                self._frames.pop(type, None)
+                self._generations[type] += 1
+                self._rollups[type].pop(temp_date, None)
+                for key in [ key for key in self._rollup_ranges if key[0] == type ]:
+                    del self._rollup_ranges[key]
+
+            temp_date += timedelta(days=1)
+
+        if last_date > self.end_date:
+            self.end_date = last_date
+            self._channels = {}
+            self._frames = {}
+            self._rollup_ranges = {}
 
     def show_status_names(self):
 
@@ -358,8 +2175,28 @@ class BlueForsLogLoader:
 class BlueForPlotter:
     """ Plot log data. """
 
-    def __init__(self, log_loader:BlueForsLogLoader):
+    _channel_labels = {"50K": "50 K", "4K": "4 K", "still": "Still", "MCX": "MCX"}
+
+    _rollup_span = timedelta(days=30) # longer ranges are plotted from rollups
+    _rollup_bins = 2000 # rough number of bins wanted over the range
+
+    def __init__(self, log_loader:BlueForsLogLoader, decimate:bool=True, rollups:bool=True):
+        """
+        Parameters
+        ----------
+        decimate : bool
+            If True, lines with more points than the axes has pixel columns are reduced
+            with downsample_m4 before plotting, which keeps their minima and maxima.
+        rollups : bool
+            If True, ranges longer than 30 days are plotted as the min/max envelope of the
+            loader's rollups instead of the raw samples, see BlueForsLogLoader.rollups.
+        """
         self.log_loader = log_loader
+        self.decimate = decimate
+        self.rollups = rollups
+        self.stats = {} # panel -> seconds spent loading and plotting it in the last plot()
+        self._live = None # state of the figure of plot_live()
+        self._live_lines = None # lines plotted by the panels while plot_live() creates its figure
 
         # set plot parameters globally
         from matplotlib import rcParams
@@ -367,9 +2204,54 @@ class BlueForPlotter:
         rcParams["xtick.labelsize"] = 12
         rcParams["ytick.labelsize"] = 12
 
+    def _plot_line(self, ax, x, y, *args, **kwargs):
+        """ ax.plot(x, y, *args, **kwargs), decimated to the axes width if enabled. """
+        if self.decimate:
+            num_buckets = max(int(ax.bbox.width), 1)
+            try:
+                x, y = downsample_m4(x, y, num_buckets)
+            except (TypeError, ValueError): # non-numeric data is plotted as it is
+                pass
+
+        return ax.plot(x, y, *args, **kwargs)
+
+    def _channels(self, type:str):
+        """
+        Return the channels of a log type, as rollups if the range is long.
+
+        A channel is only plotted from its rollup if the envelope, two points per bin, is
+        smaller than the raw samples, e.g. not for a slowly sampled channel on 1 min bins.
+        """
+        span = self.log_loader.end_date - self.log_loader.start_date + timedelta(days=1)
+        if not self.rollups or span <= self._rollup_span or self._live_lines is not None:
+            return self.log_loader.channels(type)
+
+        rollups = self.log_loader.rollups(type, resolution=span/self._rollup_bins)
+        if all( 2*len(rollup) < rollup.count.sum() for rollup in rollups.values() ):
+            return rollups
+        channels = self.log_loader.channels(type)
+        return { name: rollup if 2*len(rollup) < rollup.count.sum() or name not in channels else channels[name]
+                 for name, rollup in rollups.items() }
+
+    def _plot_channel(self, ax, type:str, name:str, *args, **kwargs):
+        """ Plot one channel of the loader, or the envelope of its rollup. """
+        channel = self._channels(type)[name]
+        if isinstance(channel, ChannelRollup):
+            return self._plot_line(ax, *channel.envelope(), *args, **kwargs)
+        lines = self._plot_line(ax, channel.times, channel.values, *args, **kwargs)
+        self._register_live(ax, lines, type, name, channel)
+        return lines
+
+    def _register_live(self, ax, lines:list, type:str, name, channel:ChannelSeries):
+        """ Remember a line plotted for plot_live(), with the time of its last sample. """
+        if self._live_lines is not None and len(channel):
+            self._live_lines.append({'ax': ax, 'line': lines[0], 'type': type, 'name': name, 'last': channel.times[-1]})
+
     def _plot_temperature(self, axes, axe_index, yscale="linear"):
         
-        if self.log_loader.temperatures.size == 0:
+        temperatures = self._channels('temperature')
+
+        if not temperatures:
             print("No temperature data available!")
         else:
             axes[axe_index].set_ylabel('Temperature (K)')
@@ -377,21 +2259,16 @@ class BlueForPlotter:
             axes[axe_index].grid()
             
             plot_symbol = '.-'
-            axes[axe_index].plot(self.log_loader.temperature_datetimes["50K"], self.log_loader.temperatures["50K"], plot_symbol, label="50 K")
-            axes[axe_index].plot(self.log_loader.temperature_datetimes["4K"], self.log_loader.temperatures["4K"], plot_symbol, label="4 K")
-            axes[axe_index].plot(self.log_loader.temperature_datetimes.still, self.log_loader.temperatures.still, plot_symbol, label="Still")
-           
-            if self.log_loader.temperatures.shape[1]==4:
-                try:
-                    axes[axe_index].plot(self.log_loader.temperature_datetimes.MCX, self.log_loader.temperatures.MCX, plot_symbol, label="MCX")
-                except ValueError:
-                    pass
+            for name in temperatures:
+                self._plot_channel(axes[axe_index], 'temperature', name, plot_symbol, label=self._channel_labels.get(name, name))
 
             axes[axe_index].legend(frameon=False)
     
     def _plot_resistance(self, axes, axe_index, yscale="linear"):
         
-        if self.log_loader.resistances.size == 0:
+        resistances = self._channels('resistance')
+
+        if not resistances:
             print("No resistance data available!")
         else:
             axes[axe_index].set_ylabel('Resistance(Ohm)')
@@ -399,22 +2276,16 @@ class BlueForPlotter:
             axes[axe_index].grid()
             
             plot_symbol = '.-'
-            axes[axe_index].plot(self.log_loader.resistance_datetimes["50K"], self.log_loader.resistances["50K"], plot_symbol, label="50 K")
-            axes[axe_index].plot(self.log_loader.resistance_datetimes["4K"], self.log_loader.resistances["4K"], plot_symbol, label="4 K")
-            axes[axe_index].plot(self.log_loader.resistance_datetimes.still, self.log_loader.resistances.still, plot_symbol, label="Still")
-           
-            if self.log_loader.resistances.shape[1]==4:
-                try:
-                    axes[axe_index].plot(self.log_loader.resistance_datetimes.MCX, self.log_loader.resistances.MCX, plot_symbol, label="MCX")
-                except ValueError:
-                    pass
+            for name in resistances:
+                self._plot_channel(axes[axe_index], 'resistance', name, plot_symbol, label=self._channel_labels.get(name, name))
 
             axes[axe_index].legend(frameon=False)
 
     def _plot_pressure(self, axes, axe_index, yscale="linear"):
 
-        
-        if self.log_loader.pressures.size == 0:
+        pressures = self._channels('pressure')
+
+        if not pressures:
             print("No pressure data available!")
         else:
 
@@ -423,18 +2294,15 @@ class BlueForPlotter:
             axes[axe_index].grid()
             
             plot_symbol = '.-'
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P1, plot_symbol, label="P1")
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P2, plot_symbol, label="P2")
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P3, plot_symbol, label="P3")
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P4, plot_symbol, label="P4")
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P5, plot_symbol, label="P5")
-            axes[axe_index].plot(self.log_loader.pressure_datetime, self.log_loader.pressures.P6, plot_symbol, label="P6")
+            for name in pressures:
+                if not BlueForsLogLoader.is_gauge_flag(name):
+                    self._plot_channel(axes[axe_index], 'pressure', name, plot_symbol, label=name)
           
             axes[axe_index].legend(frameon=False)
 
     def _plot_flowmeter(self, axes, axe_index, yscale="linear"):
 
-        if self.log_loader.flowmeter.size == 0:
+        if not self._channels('flowmeter'):
             print("No pressure data available!")
         else:
             axes[axe_index].set_xlabel('Datetime')
@@ -442,13 +2310,15 @@ class BlueForPlotter:
             axes[axe_index].grid()
             
             plot_symbol = '.-'
-            axes[axe_index].plot(self.log_loader.flowmeter_datetime, self.log_loader.flowmeter.flowmeter, plot_symbol, label="Flowmeter")
+            self._plot_channel(axes[axe_index], 'flowmeter', 'flowmeter', plot_symbol, label="Flowmeter")
             
             axes[axe_index].legend(frameon=False)
 
     def _plot_status(self, axes, axe_index, yscale="linear", status_list=None):
          
-        if self.log_loader.status.size == 0:
+        status = self._channels('status')
+
+        if not status:
             print("No status data available!")
         else:                
             axes[axe_index].set_xlabel('Datetime')
@@ -456,21 +2326,18 @@ class BlueForPlotter:
             axes[axe_index].set_yscale(yscale)
             axes[axe_index].grid()
 
-            legend_labels = self.log_loader._status_column_name
-
             plot_symbol = '.-'
-            for i, label in enumerate(legend_labels):
-                if status_list is not None:
-                    if label in status_list:
-                        axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status[label], plot_symbol, label=label)  
-                else:
-                    axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status[label], plot_symbol, label=label)  
+            for label in status:
+                if status_list is None or label in status_list:
+                    self._plot_channel(axes[axe_index], 'status', label, plot_symbol, label=label)
 
             axes[axe_index].legend(fancybox=True, shadow=True)
 
     def _plot_compressor_pressure(self, axes, axe_index, yscale='linear'):
     
-        if self.log_loader.status.size == 0:
+        status = self._channels('status')
+
+        if not status:
             print("No status data available!")
         else:                
             axes[axe_index].set_xlabel('Datetime')
@@ -478,28 +2345,30 @@ class BlueForPlotter:
             axes[axe_index].set_yscale(yscale)
             axes[axe_index].grid()
 
-            legend_labels = self.log_loader._status_column_name
-
-            for i, label in enumerate(legend_labels):
-                if label=="cpalp" or label=="cpavgl":  cpalp_index = i
-                if label=="cpahp" or label=="cpavgh":  cpahp_index = i
-                if label=="cpalp_2":  cpalp_2_index = i
-                if label=="cpahp_2":  cpahp_2_index = i
-            
-            axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpahp_index], 'r.-', label="High P")            
-            axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpalp_index], 'b.-', label="Low P")            
-            axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpahp_index] - self.log_loader.status.iloc[:,cpalp_index], 'k.-', label="Delta P")        
-            
-            if "cpalp_2" in self.log_loader._status_column_name:
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpahp_2_index], 'r.-', label="High P")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpalp_2_index], 'b.-', label="Low P")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.iloc[:,cpahp_2_index] - self.log_loader.status.iloc[:,cpalp_2_index], 'k.-', label="Delta P")        
+            for suffix in ["", "_2"][:self.log_loader.compressors()]:
+                low_name = "cpalp" + suffix if "cpalp" + suffix in status else "cpavgl" + suffix
+                high_name = "cpahp" + suffix if "cpahp" + suffix in status else "cpavgh" + suffix
+                if low_name not in status or high_name not in status:
+                    continue
+
+                low, high = status[low_name], status[high_name]
+                self._plot_channel(axes[axe_index], 'status', high_name, 'r.-', label="High P")
+                self._plot_channel(axes[axe_index], 'status', low_name, 'b.-', label="Low P")
+                if isinstance(high, ChannelRollup) and isinstance(low, ChannelRollup): # difference of the bin means
+                    _, i, j = np.intersect1d(high.times, low.times, return_indices=True)
+                    self._plot_line(axes[axe_index], high.times[i], high.mean[i] - low.mean[j], 'k.-', label="Delta P")
+                elif "delta_p" + suffix in self.log_loader.derived_channels:
+                    delta = self.log_loader.derived("delta_p" + suffix)
+                    lines = self._plot_line(axes[axe_index], delta.times, delta.values, 'k.-', label="Delta P")
+                    self._register_live(axes[axe_index], lines, 'status', (high_name, low_name), delta)
             
             axes[axe_index].legend(frameon=False)
 
     def _plot_compressor_temperature(self, axes, axe_index, yscale='linear'):
     
-        if self.log_loader.status.size == 0:
+        status = self._channels('status')
+
+        if not status:
             print("No status data available!")
         else:                
             axes[axe_index].set_xlabel('Datetime')
@@ -507,28 +2376,18 @@ class BlueForPlotter:
             axes[axe_index].set_yscale(yscale)
             axes[axe_index].grid()
 
-            legend_labels = self.log_loader._status_column_name
-
-            try:
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempwi, label="Water In 1")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempwo, label="Water Out 1")
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempo, label="Oil 1 ")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatemph, label="Helium 1")                
-            except AttributeError:
-                pass
-          
-            try:
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempwi_2, label="Water In 2")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempwo_2, label="Water Out 2")    
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatempo, label="Oil 2")            
-                axes[axe_index].plot(self.log_loader.status_datatime, self.log_loader.status.cpatemph, label="Helium 2")            
-            except AttributeError:
-                pass        
+            labels = {"cpatempwi": "Water In", "cpatempwo": "Water Out", "cpatempo": "Oil", "cpatemph": "Helium"}
+            for suffix, number in [("", 1), ("_2", 2)]:
+                for name, label in labels.items():
+                    if name + suffix in status:
+                        self._plot_channel(axes[axe_index], 'status', name + suffix, label=f"{label} {number}")
 
             axes[axe_index].legend(frameon=False)
 
-    def plot(self, what_to_plot:list[str], yscale="linear", status_list=None):
-        
+    def _figure(self, what_to_plot:list[str], yscale="linear", status_list=None):
+        """ Create a figure with one panel per entry of what_to_plot. """
+        import matplotlib.pyplot as plt # imported on first use, so loading logs does not pay for it
+
         num_plot = len(what_to_plot)
         
         fig, axes = plt.subplots(num_plot, 1,sharex=True, figsize=(12, 3*num_plot))
@@ -540,6 +2399,7 @@ class BlueForPlotter:
         fig.suptitle(title, fontsize=16)
 
         for axe_index, what in enumerate(what_to_plot):
+            t0 = time.perf_counter()
             if what=="temperature":
                self._plot_temperature(axes, axe_index, yscale=yscale)
             elif what=="pressure":
@@ -558,8 +2418,227 @@ class BlueForPlotter:
                 print("\n#########################################")
                 print(f"Plotting \"{what}\" is not implemented yet!")
                 print("#########################################")
-            
+            self.stats[what] = time.perf_counter() - t0
+            logger.debug("plot %s %.3f s", what, self.stats[what])
+
+        return fig, axes
+
+    @_profiled
+    def plot(self, what_to_plot:list[str], yscale="linear", status_list=None):
+
+        fig, _ = self._figure(what_to_plot, yscale, status_list)
+
+        t0 = time.perf_counter()
         fig.show()
+        self.stats['show'] = time.perf_counter() - t0
+
+    @_profiled
+    def save(self, what_to_plot:list[str], file_name:str, yscale="linear", status_list=None, dpi:int=100):
+        """
+        Plot like plot() and save the figure to file_name, e.g. a .png or .svg file, instead of
+        showing it. The figure is closed afterwards, so this suits headless reports with the
+        Agg backend.
+        """
+        import matplotlib.pyplot as plt
+
+        fig, _ = self._figure(what_to_plot, yscale, status_list)
+
+        t0 = time.perf_counter()
+        try:
+            fig.savefig(file_name, dpi=dpi)
+        finally:
+            plt.close(fig)
+        self.stats['save'] = time.perf_counter() - t0
+
+    _live_headroom = 0.1 # fraction of the x range left empty on the right of a live plot
+    _live_tail = 256 # new points redrawn at each update before they are merged into the background
+
+    def plot_live(self, what_to_plot:list[str], yscale="linear", status_list=None):
+        """
+        Plot like plot(), in a figure that update_live() extends with the new samples.
+
+        The figure and its lines are created once. Each line is drawn as a history line
+        and a short tail line holding the samples appended since the last full draw. When
+        the canvas supports blitting, an update restores the saved background, which
+        contains the history, and redraws only the tails; a full tail is merged into the
+        history line, which is reduced with downsample_m4 when it exceeds a few points per
+        pixel column. The axes are only rescaled when new samples fall outside them, so
+        the cost of an update does not grow with the history shown. Channels are always
+        plotted from the raw samples, without rollups.
+
+        Returns
+        -------
+        matplotlib.figure.Figure
+        """
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+
+        self.close_live()
+        self._live_lines = []
+        try:
+            fig, _ = self._figure(what_to_plot, yscale, status_list)
+            entries = self._live_lines
+        finally:
+            self._live_lines = None
+
+        canvas = fig.canvas
+        blit = canvas.supports_blit
+        for entry in entries:
+            x, y = entry['line'].get_data(orig=True)
+            entry['x'] = np.asarray(mdates.date2num(x), dtype=float)
+            entry['y'] = np.asarray(y, dtype=float)
+            entry['n'] = len(x)
+            entry['line'].set_data(entry['x'], entry['y'])
+
+            # the tail starts at the last point of the history, so that the line is continuous
+            entry['tail'] = entry['ax'].add_line(plt.Line2D(entry['x'][-1:], entry['y'][-1:]))
+            entry['tail'].update_from(entry['line'])
+            entry['tail'].set_label('_nolegend_')
+            entry['tail'].set_animated(blit)
+
+        self._live = {'fig': fig, 'lines': entries, 'blit': blit, 'background': None,
+                      'axes': list(dict.fromkeys(entry['ax'] for entry in entries))}
+        if blit:
+            self._live['draw_id'] = canvas.mpl_connect('draw_event', self._on_live_draw)
+        for ax in self._live['axes']:
+            self._rescale_live(ax)
+
+        fig.show()
+        self._draw_live(full=True)
+        return fig
+
+    def _on_live_draw(self, event):
+        """ Save the background of the live figure after every full draw, e.g. on resize. """
+        live = self._live
+        live['background'] = live['fig'].canvas.copy_from_bbox(live['fig'].bbox)
+        for entry in live['lines']:
+            entry['ax'].draw_artist(entry['tail'])
+
+    def _rescale_live(self, ax):
+        """ Fit the axes to its lines, with headroom on the right for the next samples. """
+        ax.relim()
+        ax.autoscale_view()
+        x_min, x_max = ax.get_xlim()
+        ax.set_xlim(x_min, x_max + (x_max - x_min)*self._live_headroom)
+
+    def _draw_live(self, full:bool=False):
+        live = self._live
+        canvas = live['fig'].canvas
+        if not live['blit']:
+            canvas.draw_idle()
+        elif full or live['background'] is None:
+            canvas.draw() # _on_live_draw saves the background and draws the tails
+            canvas.blit(live['fig'].bbox)
+        else:
+            canvas.restore_region(live['background'])
+            for entry in live['lines']:
+                entry['ax'].draw_artist(entry['tail'])
+            canvas.blit(live['fig'].bbox)
+        canvas.flush_events()
+
+    def _append_live(self, entry:dict, x:np.ndarray, y:np.ndarray):
+        """
+        Append points to the tail of a live line. A full tail is merged into the history line,
+        whose older points are reduced when it gets long. Returns True if the history changed.
+        """
+        tail_x, tail_y = entry['tail'].get_data()
+        tail_x, tail_y = np.concatenate((tail_x, x)), np.concatenate((tail_y, y))
+        if len(tail_x) <= self._live_tail:
+            entry['tail'].set_data(tail_x, tail_y)
+            return False
+
+        n, m = entry['n'], len(tail_x) - 1
+        if n + m > len(entry['x']): # grow the buffers geometrically, so appending is amortized O(1)
+            size = max(2*(n + m), 1024)
+            entry['x'] = np.resize(entry['x'][:n], size)
+            entry['y'] = np.resize(entry['y'][:n], size)
+        entry['x'][n:n + m] = tail_x[1:]
+        entry['y'][n:n + m] = tail_y[1:]
+        n += m
+
+        num_buckets = max(int(entry['ax'].bbox.width), 1)
+        if self.decimate and n > 8*num_buckets:
+            x, y = downsample_m4(entry['x'][:n], entry['y'][:n], num_buckets)
+            n = len(x)
+            entry['x'][:n], entry['y'][:n] = x, y
+
+        entry['n'] = n
+        entry['line'].set_data(entry['x'][:n], entry['y'][:n])
+        entry['tail'].set_data(tail_x[-1:], tail_y[-1:])
+        return True
+
+    def update_live(self, refresh:bool=True, today:date=None, follow:bool=None):
+        """
+        Append the samples added since the last update to the lines of plot_live().
+
+        Parameters
+        ----------
+        refresh : bool
+            If True, read the new lines of the log files first with the loader's refresh().
+        today, follow
+            Passed to refresh().
+
+        Returns
+        -------
+        int
+            Number of samples appended.
+        """
+        import matplotlib.dates as mdates
+
+        live = self._live
+        if live is None:
+            raise Exception("Call plot_live() first!")
+
+        t0 = time.perf_counter()
+        if refresh:
+            self.log_loader.refresh(today, follow)
+
+        new, rescale, merged, appended = {}, set(), False, 0
+        for entry in live['lines']:
+            key = (entry['type'], entry['last'])
+            if key not in new:
+                new[key] = self.log_loader.channels_since(*key)
+
+            name = entry['name']
+            if isinstance(name, tuple): # difference of two channels sharing their times
+                a, b = new[key].get(name[0]), new[key].get(name[1])
+                if a is None or b is None or not np.array_equal(a.times, b.times):
+                    continue
+                channel = ChannelSeries(a.times, a.values - b.values)
+            else:
+                channel = new[key].get(name)
+            if channel is None or len(channel) == 0:
+                continue
+
+            x = np.asarray(mdates.date2num(channel.times), dtype=float)
+            y = np.asarray(channel.values, dtype=float)
+            merged |= self._append_live(entry, x, y)
+            entry['last'] = channel.times[-1]
+            appended += len(channel)
+
+            x_min, x_max = entry['ax'].get_xlim()
+            y_min, y_max = entry['ax'].get_ylim()
+            with np.errstate(invalid='ignore'):
+                if x[-1] > x_max or (y < y_min).any() or (y > y_max).any():
+                    rescale.add(entry['ax'])
+
+        for ax in rescale:
+            self._rescale_live(ax)
+        if appended:
+            self._draw_live(full=bool(rescale) or merged)
+
+        self.stats['update'] = time.perf_counter() - t0
+        logger.debug("update_live %d samples %.3f s", appended, self.stats['update'])
+        return appended
+
+    def close_live(self):
+        """ Close the figure of plot_live(). """
+        if self._live is not None:
+            import matplotlib.pyplot as plt
+            if 'draw_id' in self._live:
+                self._live['fig'].canvas.mpl_disconnect(self._live['draw_id'])
+            plt.close(self._live['fig'])
+            self._live = None
 
 if __name__ == "__main__":
     
@@ -571,6 +2650,9 @@ if __name__ == "__main__":
     # log_loader = BlueForsLogLoader(log_folder, start_date, end_date)
     log_loader = BlueForsLogLoader(log_folder, start_date, end_date, what_type_to_load="temperature")
     # log_loader.show_status_names()
+    # from bluefors_fleet import BlueForsFleetLoader
+    # fleet = BlueForsFleetLoader({"BF5": log_folder, "BF6": r"Z:\logs\BF6\Logfiles"}, start_date, end_date, what_type_to_load="temperature")
+    # log_loader = fleet["BF5"]
 
     # plot
     plotter = BlueForPlotter(log_loader=log_loader)
@@ -0,0 +1,215 @@
+# Partitioned binary store for bluefors_log_view
+# Convert Bluefors log folders into compressed columnar partitions, one per log type and
+# month, and read back only the partitions and channels covering a query.
+
+import os
+import json
+import tempfile
+import numpy as np
+from datetime import date, timedelta
+
+from bluefors_log_view import BlueForsLogLoader, BlueForsLogManifest, ChannelSeries
+
+
+class BlueForsLogStore:
+    """ Store of log channels as compressed .npz partitions, one per log type and month.
+
+    Layout of a store folder::
+
+        <path>/<type>/<yyyy-mm>.npz
+
+    with the members
+
+        meta            JSON: version, log folder, source files of every day and the times
+                        group of every channel
+        times/<k>       differences of the int64 datetime64[s] times of group k; channels
+                        logged together, e.g. the status keys, share one group
+        values/<name>   values of a channel, float64, or int8 for the maxigauge flags
+
+    Every member is a separate zlib stream that numpy only decompresses when it is
+    accessed, so a query reads the partitions of the months it covers and, in those,
+    only the channels it asks for. Times are stored as differences, which compress to
+    almost nothing for regularly sampled logs.
+
+    Example
+    -------
+        store = BlueForsLogStore(r"D:\\bluefors_store\\BF5")
+        store.export(r"Z:\\logs\\BF5\\Logfiles")  # only new or changed months are converted
+        mcx = store.query('temperature', ['MCX'], start=date(2024,9,1), end=date(2024,10,1))['MCX']
+    """
+
+    _version = 2 # bump when the layout of a partition changes
+
+    def __init__(self, path:str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _partition_path(self, type:str, month:date):
+        return os.path.join(self.path, type, f"{month:%Y-%m}.npz")
+
+    def types(self):
+        """ Return the log types that have partitions. """
+        return sorted(entry.name for entry in os.scandir(self.path) if entry.is_dir())
+
+    def partitions(self, type:str):
+        """ Return the sorted months (first day) that have a partition of a log type. """
+        folder = os.path.join(self.path, type)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(date(int(name[:4]), int(name[5:7]), 1) for name in os.listdir(folder)
+                      if name.endswith('.npz') and len(name) == 11)
+
+    def _read_meta(self, path:str):
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                return json.loads(str(npz['meta']))
+        except (ValueError, KeyError, OSError):
+            return None
+
+    def channels(self, type:str):
+        """ Return the channel names of a log type, in the order of their first partition. """
+        names = {}
+        for month in self.partitions(type):
+            meta = self._read_meta(self._partition_path(type, month))
+            if meta is not None:
+                names.update(dict.fromkeys(meta['channels']))
+        return list(names)
+
+    def export(self, log_folder:str, start_date:date=None, end_date:date=None, what_type_to_load:str=None,
+               overwrite:bool=False, **kwargs):
+        """
+        Convert the log files of a folder into partitions, month by month.
+
+        The days of a month are parsed, written as one partition per log type and dropped
+        from memory before the next month is read, so memory use is bounded by one month
+        of data whatever the size of the archive. A partition is skipped if the names,
+        sizes and mtimes of its source files are those it was written from, so running
+        export again only converts new and changed months, e.g. the current one.
+
+        Parameters
+        ----------
+        start_date, end_date : date
+            Range of days to convert, extended to whole months. All folders if None.
+        what_type_to_load : str
+            Log type to convert, or None for all of them.
+        overwrite : bool
+            If True, partitions are written even if their source files are unchanged.
+        kwargs
+            Passed to BlueForsLogLoader, e.g. reader='mmap' or status_keys.
+
+        Returns
+        -------
+        list
+            Paths of the partitions written.
+        """
+        manifest = kwargs.pop('manifest', None)
+        if not isinstance(manifest, BlueForsLogManifest):
+            manifest = BlueForsLogManifest(log_folder, manifest if isinstance(manifest, str) else None)
+
+        days = manifest.dates()
+        if start_date is not None:
+            days = [ day for day in days if day >= start_date.replace(day=1) ]
+        if end_date is not None:
+            next_month = (end_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+            days = [ day for day in days if day < next_month ]
+        if not days:
+            return []
+
+        months = {}
+        for day in days:
+            months.setdefault(day.replace(day=1), []).append(day)
+
+        loader = BlueForsLogLoader(log_folder, days[0], days[-1], what_type_to_load=what_type_to_load, lazy=True,
+                                   manifest=manifest, **kwargs)
+        types = loader.log_types if what_type_to_load is None else [what_type_to_load]
+
+        written = []
+        for month, month_days in months.items():
+            source = { f"{day:%y-%m-%d}": manifest.files(day) for day in month_days }
+            window = loader.window(month_days[0], month_days[-1])
+            for type in types:
+                path = self._partition_path(type, month)
+                meta = None if overwrite else self._read_meta(path)
+                if meta is not None and meta['version'] == self._version and meta['source'] == source:
+                    continue
+
+                channels = window.channels(type)
+                self._write(path, {'version': self._version, 'log_folder': os.path.abspath(log_folder),
+                                   'type': type, 'source': source}, channels)
+                written.append(path)
+
+                # keep one month in memory at a time
+                for day in month_days:
+                    loader._days[type].pop(day, None)
+                    loader._rollups[type].pop(day, None)
+                window._channels.pop(type, None)
+                window._frames.pop(type, None)
+
+        return written
+
+    def _write(self, path:str, meta:dict, channels:dict):
+        times, times_index = [], {}
+        for channel in channels.values():
+            if id(channel.times) not in times_index:
+                times_index[id(channel.times)] = len(times)
+                times.append(channel.times)
+
+        meta = dict(meta, channels={ name: times_index[id(channel.times)] for name, channel in channels.items() })
+        arrays = {'meta': np.array(json.dumps(meta))}
+        for k, array in enumerate(times):
+            arrays[f"times/{k}"] = np.diff(array.astype(np.int64), prepend=np.int64(0))
+        for name, channel in channels.items():
+            arrays[f"values/{name}"] = np.asarray(channel.values)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def query(self, type:str, names:list=None, start=None, end=None):
+        """
+        Return channels of a log type, optionally restricted to start <= time < end.
+
+        Only the partitions of the months overlapping the range are opened, and only the
+        members of the requested channels and their times are decompressed.
+
+        Parameters
+        ----------
+        names : list
+            Channel names, e.g. ['MCX', '4K']. All channels if None.
+        start, end : datetime
+            Optional bounds of the samples.
+
+        Returns
+        -------
+        dict
+            {name: ChannelSeries}
+        """
+        first = None if start is None else np.datetime64(start, 'M').astype(date)
+        last = None if end is None else (np.datetime64(end, 's') - np.timedelta64(1, 's')).astype('datetime64[M]').astype(date)
+        months = [ month for month in self.partitions(type)
+                   if (first is None or month >= first) and (last is None or month <= last) ]
+
+        parts = []
+        for month in months:
+            with np.load(self._partition_path(type, month), allow_pickle=False) as npz:
+                meta = json.loads(str(npz['meta']))
+                wanted = meta['channels'] if names is None else [ name for name in names if name in meta['channels'] ]
+
+                times, channels = {}, {}
+                for name in wanted:
+                    k = meta['channels'][name]
+                    if k not in times:
+                        times[k] = np.cumsum(npz[f"times/{k}"]).astype('datetime64[s]')
+                    channels[name] = ChannelSeries(times[k], npz[f"values/{name}"])
+            parts.append(channels)
+
+        channels = ChannelSeries.concat_channels(parts)
+        if start is None and end is None:
+            return channels
+        return { name: channel.between(start, end) for name, channel in channels.items() }
+
+    def series(self, type:str, name:str, start=None, end=None):
+        """ Return one channel as a pandas Series with a DatetimeIndex, see query. """
+        return self.query(type, [name], start, end)[name].to_series(name)
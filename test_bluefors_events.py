@@ -0,0 +1,73 @@
+""" Tests of the incremental event detection of bluefors_events. """
+
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from bluefors_events import EventDetector
+from bluefors_log_view import BlueForsLogLoader
+
+
+def _samples(num:int):
+    """ Minute samples of MCX with warm-ups and spikes, and of a compressor that trips. """
+    random = np.random.default_rng(4)
+    times = [ datetime(2024, 9, 1) + timedelta(minutes=i) for i in range(num) ]
+    mcx = 0.01 + 1e-4*random.standard_normal(num)
+    mcx[500:620] = 0.5
+    mcx[[1500, 2300, 3900]] = 0.03
+    mcx[-40:] = 0.8 # still warm at the end
+    run = np.ones(num)
+    run[1000:1100] = run[3000:] = 0
+    high = 20.0 + 0.1*random.standard_normal(num)
+    high[1000:1100] = 8.5
+    return times, mcx, run, high
+
+def _append(folder:str, times:list, mcx:np.ndarray, run:np.ndarray, high:np.ndarray):
+    """ Append the samples to the CH6 T and Status_ logs of their days. """
+    for time, t, r, h in zip(times, mcx, run, high):
+        day = time.strftime('%y-%m-%d')
+        os.makedirs(os.path.join(folder, day), exist_ok=True)
+        stamp = time.strftime('%d-%m-%y,%H:%M:%S')
+        with open(os.path.join(folder, day, f'CH6 T {day}.log'), 'a') as f:
+            f.write(f"{stamp},{t:.6E}\n")
+        with open(os.path.join(folder, day, f'Status_{day}.log'), 'a') as f:
+            f.write(f"{stamp},cparun,{r:.6E},cpahp,{h:.6E},cpalp,{8.0:.6E}\n")
+
+def _detector():
+    detector = EventDetector()
+    detector.add_threshold('temperature', 'MCX', above=0.1, min_duration='10min')
+    detector.add_spikes('temperature', 'MCX', window='2h', nsigma=8)
+    detector.add_threshold('status', ('cpahp', 'cpalp'), below=5)
+    detector.add_state_changes('status', 'cparun', to_value=0)
+    detector.add_state_changes('status', 'cparun')
+    return detector
+
+def test_update_after_refresh_equals_detect(tmp_path, capsys):
+    folder = str(tmp_path)
+    samples = _samples(3*1440 - 100)
+    cuts = [2000, 2150, 2600, 2880, 2900, 3050, len(samples[0])] # into day 2, then over midnight into day 3
+    _append(folder, *(column[:cuts[0]] for column in samples))
+
+    loader = BlueForsLogLoader(folder, date(2024, 9, 1), date(2024, 9, 2), lazy=True, reader='mmap')
+    detector = _detector()
+    events = detector.detect(loader)
+    assert len(events)
+
+    history = loader.channels
+    def channels(type): # updates must not concatenate the whole history again
+        raise AssertionError(f"update() read all the {type} channels")
+
+    for first, last in zip(cuts[:-1], cuts[1:]):
+        _append(folder, *(column[first:last] for column in samples))
+        today = samples[0][last - 1].date()
+        loader.refresh(today=today)
+        loader.channels = channels
+        events = detector.update(loader)
+        loader.channels = history
+
+        fresh = BlueForsLogLoader(folder, date(2024, 9, 1), today, lazy=True, reader='mmap')
+        pd.testing.assert_frame_equal(events, _detector().detect(fresh))
+
+    assert set(events['kind']) == {'threshold', 'spike', 'state'}
@@ -0,0 +1,87 @@
+""" Tests of the loader and plotter helpers of bluefors_log_view. """
+
+import os
+import pickle
+from datetime import date
+
+import numpy as np
+import pytest
+
+from bluefors_log_view import BlueForsLogLoader, BlueForsLogManifest, _compile_expression, downsample_m4
+from test_bluefors_events import _append, _samples
+
+
+def test_downsample_m4_returns_short_lines_unchanged():
+    x, y = downsample_m4(np.arange(6.0), [1, 2, np.nan, np.nan, 3, 4], 100)
+    np.testing.assert_array_equal(x, np.arange(6.0))
+    np.testing.assert_array_equal(y, [1, 2, np.nan, np.nan, 3, 4])
+
+def test_downsample_m4_keeps_extremes_and_breaks_at_nan_runs():
+    x = np.arange(100000).astype('datetime64[s]')
+    y = np.sin(np.arange(100000)/1000.0)
+    y[:5] = y[20000:30000] = y[50000] = np.nan
+    dx, dy = downsample_m4(x, y, 100)
+
+    assert len(dx) <= 4*100 + 5*3
+    assert np.nanmin(dy) == np.nanmin(y) and np.nanmax(dy) == np.nanmax(y)
+    np.testing.assert_array_equal(dx[np.isnan(dy)], x[[0, 20000, 50000]])
+    kept = np.searchsorted(x, dx)
+    for a, b in zip(kept[:-1], kept[1:]): # no drawn segment bridges a NaN
+        if not np.isnan(y[a]) and not np.isnan(y[b]):
+            assert not np.isnan(y[a:b + 1]).any()
+
+
+@pytest.mark.parametrize("expression", [
+    "np.__builtins__", "np.__dict__['load'](pressure.P1)", "pressure.__class__", "pressure.P1.__class__",
+    "np.add(pressure.P1, 1, out=pressure.P2)", "np.round(pressure.P1, decimals=2, out=pressure.P1)",
+    "(lambda x: x)(pressure.P1)", "np.maximum(*pressure.P1)", "np.maximum(*[pressure.P1, pressure.P2])",
+    "pressure.P1[0]", "pressure['P1'][1:]", "np.sum(pressure.P1)", "__import__('os')", "pressure.P1 + 'a'"])
+def test_compile_expression_rejects_anything_but_elementwise_numpy(expression):
+    with pytest.raises(Exception, match="in \"|uses no channel"):
+        _compile_expression(expression, ['pressure', 'temperature'])
+
+def test_compile_expression_accepts_elementwise_numpy():
+    code, inputs = _compile_expression("np.where(pressure.P1 > 0, np.log10(pressure.P2/pressure.P1), -temperature['50K'])",
+                                       ['pressure', 'temperature'])
+    assert inputs == [('pressure', 'P1'), ('pressure', 'P2'), ('temperature', '50K')]
+
+
+DERIVED = { f"{path} {transform}": (expression, dict(kwargs, transform=transform)) for transform in (None, 'rate', 'integral')
+            for path, expression, kwargs in [('samples', "status.cpahp - status.cpalp", {}),
+                                             ('grid', "temperature.MCX*status.cpahp", dict(freq='7min')),
+                                             ('asof', "temperature.MCX + status.cparun", dict(freq='3min', how='asof', tolerance='20min'))] }
+
+def _define(loader:BlueForsLogLoader):
+    for name, (expression, kwargs) in DERIVED.items():
+        loader.define(name, expression, **kwargs)
+    return loader
+
+def test_derived_after_refresh_equals_fresh_loader(tmp_path):
+    folder = str(tmp_path)
+    samples = _samples(3*1440 - 100)
+    cuts = [1000, 1003, 1439, 1441, 2000, 2900, len(samples[0])] # in day 1, over midnight twice
+    _append(folder, *(column[:cuts[0]] for column in samples))
+
+    loader = _define(BlueForsLogLoader(folder, date(2024, 9, 1), date(2024, 9, 1), lazy=True, reader='mmap'))
+    for first, last in zip(cuts[:-1], cuts[1:]):
+        for name in DERIVED:
+            loader.derived(name)
+        _append(folder, *(column[first:last] for column in samples))
+        today = samples[0][last - 1].date()
+        loader.refresh(today=today)
+
+        fresh = _define(BlueForsLogLoader(folder, date(2024, 9, 1), today, lazy=True, reader='mmap'))
+        for name in DERIVED:
+            result, expected = loader.derived(name), fresh.derived(name)
+            np.testing.assert_array_equal(result.times, expected.times, err_msg=name)
+            np.testing.assert_array_equal(result.values, expected.values, err_msg=name)
+
+
+def test_manifest_pickles_for_worker_processes(tmp_path):
+    _append(str(tmp_path), *(column[:1500] for column in _samples(3*1440 - 100)))
+    manifest = pickle.loads(pickle.dumps(BlueForsLogManifest(str(tmp_path))))
+
+    assert manifest.dates() == [date(2024, 9, 1), date(2024, 9, 2)]
+    manifest.update(since=date(2024, 9, 2))
+    file_name = str(tmp_path/'24-09-02'/'CH6 T 24-09-02.log')
+    assert manifest.stat(file_name)[0] == os.path.getsize(file_name)
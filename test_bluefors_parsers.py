@@ -0,0 +1,199 @@
+""" Regression tests of the NumPy log parsers against float(), int() and pandas.read_csv. """
+
+import io
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bluefors_log_view import (_decode_scientific, _parse_maxigauge_block, _to_float, iter_status_chunks, parse_channel_buffer,
+                               parse_maxigauge_buffer, parse_status_buffer)
+
+NEWLINES = ['\n', '\r\n']
+BLOCK_SIZES = [1<<18, 1000, 64] # 64 is shorter than any line
+
+
+def _scientific(random, num:int, mantissa_digits:int, letter:str='E', exponent_digits:int=2, max_exponent:int=12):
+    """ Return num random 'd.dddE+dd' numbers as text. """
+    mantissas = random.uniform(1, 9.9, num) # not rounded up to 10.00
+    limit = min(max_exponent, 10**exponent_digits - 1)
+    exponents = random.integers(-limit, limit + 1, num)
+    return [ f"{m:.{mantissa_digits}f}{letter}{'-' if x < 0 else '+'}{abs(x):0{exponent_digits}d}" for m, x in zip(mantissas, exponents) ]
+
+def _log(rows:list, newline:str='\n', ragged:bool=True):
+    """
+    Return the lines and the text of a log with a 'dd-mm-yy,HH:MM:SS,' timestamp before each row,
+    every 5 min. Ragged logs have a leading space on some lines and some blank lines.
+    """
+    start = datetime(2024, 9, 1)
+    lines = []
+    for i, row in enumerate(rows):
+        lines.append((' ' if ragged and i % 7 == 0 else '') + (start + timedelta(minutes=5*i)).strftime('%d-%m-%y,%H:%M:%S,') + row)
+        if ragged and i % 13 == 0:
+            lines.append('')
+    return lines, (newline.join(lines) + newline).encode()
+
+def _split(lines:list):
+    """ Decode the timestamps of the non-blank lines with strptime() and split the rest at the commas. """
+    lines = [ line.strip() for line in lines if line.strip() ]
+    times = np.array([ datetime.strptime(line[:17], '%d-%m-%y,%H:%M:%S') for line in lines ], dtype='datetime64[s]')
+    return times, [ line[18:].split(',') for line in lines ]
+
+def _assert_columns_equal(result, expected):
+    """ Compare (times, {name: values}) pairs, including the order of the names. """
+    (times, columns), (expected_times, expected_columns) = result, expected
+    np.testing.assert_array_equal(times, expected_times)
+    assert list(columns) == list(expected_columns)
+    for name, values in expected_columns.items():
+        np.testing.assert_array_equal(columns[name], values, err_msg=str(name))
+
+
+def _channel_log(newline:str='\n'):
+    random = np.random.default_rng(1)
+    values = _scientific(random, 200, 6, max_exponent=30) + [ f"{value:.3f}" for value in random.uniform(-5, 500, 100) ] + ['12', '-0.5', '1e-3']
+    return _log(values, newline)
+
+def _read_csv_channel(text:bytes):
+    frame = pd.read_csv(io.BytesIO(text), header=None, names=['date', 'time', 'value'], dtype={'value': float},
+                        float_precision='round_trip') # correctly rounded, like float()
+    times = pd.to_datetime(frame['date'].str.strip() + ' ' + frame['time'], format='%d-%m-%y %H:%M:%S')
+    return times.values.astype('datetime64[s]'), {'value': frame['value'].values}
+
+@pytest.mark.parametrize("newline", NEWLINES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES + [16])
+def test_parse_channel_buffer_matches_read_csv(newline, block_size):
+    lines, text = _channel_log(newline)
+    times, values = parse_channel_buffer(text, block_size=block_size)
+
+    _assert_columns_equal((times, {'value': values}), _read_csv_channel(text))
+    np.testing.assert_array_equal(times, _split(lines)[0])
+
+def test_parse_channel_buffer_range():
+    lines, text = _channel_log()
+    cut = text.index(b'\n', 1000) + 5 # in the middle of a line
+    times, values = parse_channel_buffer(text, end=cut)
+    rest_times, rest_values = parse_channel_buffer(text, start=text.rindex(b'\n', 0, cut) + 1)
+
+    _assert_columns_equal((np.concatenate((times, rest_times)), {'value': np.concatenate((values, rest_values))}), _read_csv_channel(text))
+
+
+@pytest.mark.parametrize("mantissa_digits, letter, exponent_digits", [(2, 'E', 2), (6, 'E', 2), (3, 'e', 2), (10, 'E', 2), (4, 'e', 1)])
+def test_decode_scientific_matches_float(mantissa_digits, letter, exponent_digits):
+    tokens = _scientific(np.random.default_rng(mantissa_digits), 500, mantissa_digits, letter, exponent_digits)
+    chars = np.array([ token.encode() for token in tokens ]).view(np.uint8).reshape(len(tokens), -1)
+    expected = np.array([ float(token) for token in tokens ])
+
+    np.testing.assert_array_equal(_decode_scientific(chars), expected)
+    np.testing.assert_array_equal(_to_float(np.array([ token.encode() for token in tokens ])), expected)
+
+def test_to_float_beyond_exact_powers_matches_float():
+    tokens = _scientific(np.random.default_rng(0), 500, 6, max_exponent=99) # powers of ten above 1e22 are not exact
+    chars = np.array([ token.encode() for token in tokens ]).view(np.uint8).reshape(len(tokens), -1)
+
+    assert _decode_scientific(chars) is None
+    np.testing.assert_array_equal(_to_float(np.array([ token.encode() for token in tokens ])), [ float(token) for token in tokens ])
+
+def test_decode_scientific_rejects_other_layouts():
+    for tokens in [[b'1.50E+05', b'1.5E+05'], [b' 1.5E+05', b'2.5E+05'], [b'-1.5E+05', b'2.5E+05'], [b'1.5E+05', b'2.5X+05'], [b'12345']]:
+        chars = np.array(tokens).view(np.uint8).reshape(len(tokens), -1)
+        assert _decode_scientific(chars) is None
+
+def test_to_float_mixed_tokens():
+    tokens = [b' 1.5E+05', b'12', b'-3.25e-3', b'7.0e5', b'nan', b'', b'garbage', b'1.00E+00 ']
+    expected = [ float(token) if token.strip() not in (b'', b'garbage') else np.nan for token in tokens ]
+    np.testing.assert_array_equal(_to_float(np.array(tokens)), expected)
+
+
+def _maxigauge_log(fixed_width:bool, newline:str='\n'):
+    """ Fixed-width logs as Bluefors writes them, or ragged ones with reordered and missing gauges. """
+    random = np.random.default_rng(2)
+    rows = []
+    for i in range(400):
+        numbers = [1, 2, 3, 4, 5, 6]
+        if not fixed_width:
+            if i % 5 == 1:
+                random.shuffle(numbers)
+            if i % 7 == 2:
+                numbers = numbers[:int(random.integers(0, 6))]
+        groups = []
+        for number in numbers:
+            pressure = _scientific(random, 1, 2)[0] if fixed_width or i % 3 else f"{random.uniform(0, 1000):.{i % 4}f}"
+            name = f"P{number}" if number != 3 or i > 10 else ''
+            state, status = (1, 0) if fixed_width else (int(random.integers(0, 2)), int(random.integers(0, 12)))
+            groups.append(f"CH{number},{name:>7}, {state},{pressure},{status},1,")
+        rows.append(''.join(groups)[:None if fixed_width or i % 2 else -1]) # the trailing comma is optional
+    return _log(rows, newline, ragged=not fixed_width)
+
+def _read_maxigauge(lines:list):
+    """ Decode a maxigauge log with split(), float() and int(), as flat {'CHn field': values}. """
+    times, rows = _split(lines)
+    gauges = {}
+    for i, fields in enumerate(rows):
+        for label, name, state, pressure, status, _ in zip(*[iter(fields)]*6):
+            gauge = gauges.setdefault(int(label[2:]), {'name': '', 'pressure': np.full(len(rows), np.nan),
+                                                       'state': np.zeros(len(rows), dtype=np.int8),
+                                                       'status': np.full(len(rows), -1, dtype=np.int8)})
+            gauge['name'] = gauge['name'] or name.strip()
+            gauge['pressure'][i], gauge['state'][i], gauge['status'][i] = float(pressure), int(state), int(status)
+    return times, _flat_gauges(gauges)
+
+def _flat_gauges(gauges:dict):
+    return { f"CH{number} {field}": value for number in sorted(gauges) for field, value in gauges[number].items() }
+
+@pytest.mark.parametrize("fixed_width", [True, False])
+@pytest.mark.parametrize("newline", NEWLINES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_parse_maxigauge_buffer_matches_float(fixed_width, newline, block_size):
+    lines, text = _maxigauge_log(fixed_width, newline)
+    times, gauges = parse_maxigauge_buffer(text, block_size=block_size)
+    _assert_columns_equal((times, _flat_gauges(gauges)), _read_maxigauge(lines))
+
+@pytest.mark.parametrize("fixed_width", [True, False])
+def test_parse_maxigauge_block_matches_float(fixed_width):
+    lines, text = _maxigauge_log(fixed_width)
+    times, gauges = _parse_maxigauge_block(np.frombuffer(text, dtype=np.uint8))
+    _assert_columns_equal((times, _flat_gauges(gauges)), _read_maxigauge(lines))
+
+
+STATUS_KEYS = ['cpastate', 'cparun', 'cpatempwi', 'cpalp', 'cpahp', 'cpalp_2', 'cpahp_2']
+
+def _status_log(newline:str='\n'):
+    """ A log where the keys of a second compressor drop out and the pairs are reordered on some lines. """
+    random = np.random.default_rng(3)
+    rows = []
+    for i in range(300):
+        present = [ key for key in STATUS_KEYS if not (key.endswith('_2') and i % 4 == 3) ]
+        if i % 6 == 5:
+            random.shuffle(present)
+        values = [ _scientific(random, 1, 6)[0] if i % 5 else f"{random.uniform(0, 100):.{i % 3}f}" for _ in present ]
+        rows.append(','.join(f"{key},{value}" for key, value in zip(present, values)))
+    return _log(rows, newline)
+
+def _read_status(lines:list, keys:list):
+    """ Decode a Status_ log with split() and float(). """
+    times, rows = _split(lines)
+    columns = { key: np.full(len(rows), np.nan) for key in keys }
+    for i, fields in enumerate(rows):
+        for key, value in zip(fields[::2], fields[1::2]):
+            if key in columns:
+                columns[key][i] = float(value)
+    return times, columns
+
+@pytest.mark.parametrize("newline", NEWLINES)
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+@pytest.mark.parametrize("keys", [None, ['cpahp_2', 'cpalp', 'missing']])
+def test_parse_status_buffer_matches_float(newline, block_size, keys):
+    lines, text = _status_log(newline)
+    # all keys come in the order of the first line, wanted keys in the given order
+    _assert_columns_equal(parse_status_buffer(text, keys=keys, block_size=block_size), _read_status(lines, keys or STATUS_KEYS))
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_iter_status_chunks_matches_float(trailing_newline):
+    lines, text = _status_log()
+    keys = ['cpahp_2', 'cpalp', 'missing']
+    chunks = list(iter_status_chunks(io.BytesIO(text if trailing_newline else text.rstrip(b'\n')), keys=keys, chunksize=37))
+
+    assert len(chunks) > 1
+    times = np.concatenate([ times for times, _ in chunks ])
+    _assert_columns_equal((times, { key: np.concatenate([ columns[key] for _, columns in chunks ]) for key in keys }), _read_status(lines, keys))